@@ -1,28 +1,135 @@
 import os
+import json
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import argparse
 from datetime import datetime
-from threading import Timer
+from threading import Timer, Lock
 import re
-from collections import defaultdict
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class DatalakeManifest:
+    """Index of the books in the datalake, kept in ``<base_directory>/manifest.jsonl``.
+
+    Each line is the full, latest entry of one book: its date directory, the
+    raw, normalized and vocabulary paths (relative to the datalake) and its
+    status, "downloaded" or "normalized". Later lines win. The file is read
+    once and appended to on every change, so lookups never list directories.
+    A datalake without a manifest is scanned once to create it.
+    """
+
+    def __init__(self, base_directory="datalake"):
+        self.base_directory = base_directory
+        self.manifest_file = os.path.join(base_directory, "manifest.jsonl")
+        self.lock = Lock()
+        self.books = {}
+        self.pending = set()
+        self.last_book_id = 0
+        if os.path.exists(self.manifest_file):
+            self.load()
+        elif os.path.isdir(base_directory):
+            self.rebuild()
+
+    def load(self):
+        with open(self.manifest_file, 'r', encoding='utf-8') as manifest:
+            for line in manifest:
+                try:
+                    self.index(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+    def rebuild(self):
+        for date_dir in sorted(os.listdir(self.base_directory)):
+            date_path = os.path.join(self.base_directory, date_dir)
+            if os.path.isdir(date_path):
+                for book_dir in os.listdir(date_path):
+                    if not os.path.exists(os.path.join(date_path, book_dir, f"{book_dir}.txt")):
+                        continue
+                    entry = {"book_id": book_dir, "date_dir": date_dir,
+                             "raw_path": os.path.join(date_dir, book_dir, f"{book_dir}.txt"),
+                             "normalized_path": None, "vocabulary_path": None, "status": "downloaded"}
+                    for key, file_name in (("normalized_path", f"normalized_{book_dir}.txt"),
+                                           ("vocabulary_path", f"vocab_{book_dir}.txt")):
+                        if os.path.exists(os.path.join(date_path, book_dir, file_name)):
+                            entry[key] = os.path.join(date_dir, book_dir, file_name)
+                            entry["status"] = "normalized"
+                    self.update(**entry)
+
+    def index(self, entry):
+        book_id = entry["book_id"]
+        self.books[book_id] = entry
+        if entry["status"] == "downloaded":
+            self.pending.add(book_id)
+        else:
+            self.pending.discard(book_id)
+        try:
+            self.last_book_id = max(self.last_book_id, int(book_id))
+        except ValueError:
+            pass
+
+    def update(self, book_id, **fields):
+        with self.lock:
+            entry = dict(self.books.get(book_id, {"book_id": book_id}), **fields)
+            os.makedirs(self.base_directory, exist_ok=True)
+            with open(self.manifest_file, 'a', encoding='utf-8') as manifest:
+                manifest.write(json.dumps(entry) + "\n")
+            self.index(entry)
+        return entry
+
+    def get(self, book_id):
+        return self.books.get(str(book_id))
+
+    def path(self, relative_path):
+        return os.path.join(self.base_directory, relative_path)
+
+
+_manifests = {}
+_manifests_lock = Lock()
+
+
+def datalake_manifest(base_directory="datalake"):
+    # One shared, already loaded manifest per datalake directory.
+    key = os.path.abspath(base_directory)
+    with _manifests_lock:
+        if key not in _manifests:
+            _manifests[key] = DatalakeManifest(base_directory)
+        return _manifests[key]
+
 
 class GutenbergFileReader:
+
+    @property
+    def manifest(self):
+        return datalake_manifest("datalake")
     
-    def download_file(self, file_url):
-        response = requests.get(file_url, stream=True)
-        if response.status_code == 200:
-            file_name = file_url.split('/')[-1][2:]
-            book_directory = file_name[:-4]
-            download_path = GuttenbergDatalakeCreator().set_file_path(book_directory, datetime.now())
-            full_path = os.path.join(download_path, file_name)
-
-            with open(full_path, 'wb') as output_file:
-                for chunk in response.iter_content(chunk_size=16384):
-                    if chunk:
-                        output_file.write(chunk)
-            print(f"Downloaded: {full_path}")
-        else:
-            print(f"Failed to download: {file_url}")
+    def download_file(self, file_url, session=None):
+        response = (session or requests).get(file_url, stream=True, timeout=60)
+        with response:
+            if response.status_code == 200:
+                file_name = file_url.split('/')[-1][2:]
+                book_directory = file_name[:-4]
+                download_path = GuttenbergDatalakeCreator().set_file_path(book_directory, datetime.now())
+                full_path = os.path.join(download_path, file_name)
+
+                # A dropped connection must not leave a truncated book behind.
+                temp_path = full_path + ".tmp"
+                with open(temp_path, 'wb') as output_file:
+                    for chunk in response.iter_content(chunk_size=16384):
+                        if chunk:
+                            output_file.write(chunk)
+                os.replace(temp_path, full_path)
+                date_dir = os.path.basename(os.path.dirname(download_path))
+                self.manifest.update(book_directory, date_dir=date_dir,
+                                     raw_path=os.path.join(date_dir, book_directory, file_name),
+                                     normalized_path=None, vocabulary_path=None, status="downloaded")
+                print(f"Downloaded: {full_path}")
+            else:
+                print(f"Failed to download: {file_url}")
+            return response.status_code
 
     def read(self, book_id):
         path = self.get_file_path(book_id)
@@ -34,11 +141,9 @@ class GutenbergFileReader:
             raise FileNotFoundError(f"File not found: {path}")
 
     def get_file_path(self, book_id):
-        base_directory = "datalake"
-        for date_dir in os.listdir(base_directory):
-            book_file = os.path.join(base_directory, date_dir, f"{book_id}/{book_id}.txt")
-            if os.path.exists(book_file):
-                return book_file
+        entry = self.manifest.get(book_id)
+        if entry is not None:
+            return self.manifest.path(entry["raw_path"])
         return "File not found"
 
 
@@ -56,45 +161,99 @@ class GuttenbergDatalakeCreator:
         os.makedirs(folder_path, exist_ok=True)
 
 
+class RateLimiter:
+    """Spaces out the requests to each host by at least ``interval`` seconds."""
+
+    def __init__(self, interval=0.0):
+        self.interval = interval
+        self.lock = Lock()
+        self.next_slot = {}
+
+    def wait(self, host):
+        if self.interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class BatchDownloader:
-    
-    def __init__(self, batch_size, gutenberg_file_reader, book_ids):
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, batch_size, gutenberg_file_reader, book_ids, concurrency=1, rate_limit=0.0, retries=3, backoff=1.0):
         self.batch_size = batch_size
         self.gutenberg_file_reader = gutenberg_file_reader
         self.book_ids = book_ids
+        self.concurrency = concurrency
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.retries = retries
+        self.backoff = backoff
+        # One keep-alive connection pool shared by every download.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def download(self):
         count = 0
         self.set_books_batch(0)
 
         while count == 0:
-            for i in range(self.batch_size):
-                try:
-                    self.gutenberg_file_reader.download_file(self.book_ids[i])
-                    count += 1
-                except Exception as e:
-                    print(f"Error downloading file: {self.book_ids[i]} - {e}")
+            count = self.download_batch()
 
             if count == 0:
                 self.set_books_batch(10)
 
+    def download_batch(self):
+        count = 0
+        book_urls = self.book_ids[:self.batch_size]
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(book_urls))) as executor:
+                futures = [executor.submit(self.download_with_retry, book_url) for book_url in book_urls]
+                results = [(book_url, future.exception()) for book_url, future in zip(book_urls, futures)]
+        else:
+            results = []
+            for book_url in book_urls:
+                try:
+                    self.download_with_retry(book_url)
+                    results.append((book_url, None))
+                except Exception as e:
+                    results.append((book_url, e))
+
+        for book_url, error in results:
+            if error is None:
+                count += 1
+            else:
+                print(f"Error downloading file: {book_url} - {error}")
+        return count
+
+    def download_with_retry(self, book_url):
+        # Connection errors and throttling/server errors are retried with an
+        # exponential backoff; any other status is final.
+        host = urlparse(book_url).netloc
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                status_code = self.gutenberg_file_reader.download_file(book_url, self.session)
+                if status_code not in self.RETRY_STATUS_CODES or attempt == self.retries:
+                    return status_code
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+            delay = self.backoff * 2 ** attempt
+            print(f"Retrying {book_url} in {delay:g}s (attempt {attempt + 2} of {self.retries + 1})")
+            time.sleep(delay)
+
     def set_books_batch(self, mod):
         start = self.get_last_book_id("datalake")
         for i in range(start + 1 + mod, start + 1 + mod + self.batch_size):
             self.book_ids[i - (start + 1 + mod)] = self.url_setter(i)
 
     def get_last_book_id(self, base_directory):
-        last_book_id = 0
-        for date_dir in os.listdir(base_directory):
-            date_dir_path = os.path.join(base_directory, date_dir)
-            if os.path.isdir(date_dir_path):
-                for book_dir in os.listdir(date_dir_path):
-                    try:
-                        book_id = int(book_dir)
-                        last_book_id = max(last_book_id, book_id)
-                    except ValueError:
-                        continue
-        return last_book_id
+        return datalake_manifest(base_directory).last_book_id
 
     def url_setter(self, book_id):
         return f"https://www.gutenberg.org/cache/epub/{book_id}/pg{book_id}.txt"
@@ -102,6 +261,12 @@ class BatchDownloader:
 
 class NormalizedGutenbergFileReader(GutenbergFileReader):
     STOPWORDS = {"el", "la", "los", "las", "y", "o", "de", "a", "en", "un", "una"}
+    WORD_PATTERN = re.compile(r'[a-záéíóúñ]+')
+
+    def __init__(self, workers=1, chunk_size=1 << 20, write_normalized=True):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.write_normalized = write_normalized
 
     def normalize_text(self, text):
         normalized = re.sub(r'[^a-záéíóúñ ]', ' ', text.lower())
@@ -113,47 +278,115 @@ class NormalizedGutenbergFileReader(GutenbergFileReader):
         filtered_text = ' '.join([word for word in words if word not in self.STOPWORDS])
         return filtered_text
 
+    def normalized_chunks(self, file):
+        """Yield, chunk by chunk, the words normalize_text would keep for the whole file.
+
+        Only ``chunk_size`` characters are read at a time. A word cut by the
+        end of a chunk is carried over and completed with the next one.
+        """
+        carry = ''
+        while True:
+            chunk = file.read(self.chunk_size)
+            if not chunk:
+                break
+            text = carry + chunk.lower()
+            words = self.WORD_PATTERN.findall(text)
+            carry = words.pop() if self.WORD_PATTERN.match(text, len(text) - 1) else ''
+            yield words
+        if carry:
+            yield [carry]
+
     def process_all_files(self):
-        base_directory = "datalake"
-        
-        for date_dir in os.listdir(base_directory):
-            date_path = os.path.join(base_directory, date_dir)
-            if os.path.isdir(date_path):
-                for book_dir in os.listdir(date_path):
-                    book_path = os.path.join(date_path, book_dir, f"{book_dir}.txt")
-                    
-                    normalized_file = os.path.join(date_path, book_dir, f"normalized_{book_dir}.txt")
-                    if os.path.exists(normalized_file):
-                        continue
-                    if os.path.exists(book_path):
-                        self.process_and_save_normalized_file(book_dir, book_path)
+        manifest = self.manifest
+        pending = []
+        for book_id in sorted(manifest.pending):
+            book_path = manifest.path(manifest.get(book_id)["raw_path"])
+            if os.path.exists(book_path):
+                pending.append((book_id, book_path))
+
+        if self.workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), initializer=init_normalize_worker,
+                                     initargs=(self.chunk_size, self.write_normalized)) as executor:
+                futures = [executor.submit(normalize_book, book_id, book_path) for book_id, book_path in pending]
+                for (book_id, book_path), future in zip(pending, futures):
+                    future.result()
+                    self.record_normalized(book_id)
+        else:
+            for book_id, book_path in pending:
+                self.process_and_save_normalized_file(book_id, book_path)
+                self.record_normalized(book_id)
+
+    def record_normalized(self, book_id):
+        entry = self.manifest.get(book_id)
+        book_directory = os.path.dirname(entry["raw_path"])
+        normalized_path = os.path.join(book_directory, f"normalized_{book_id}.txt") if self.write_normalized else None
+        self.manifest.update(book_id, normalized_path=normalized_path,
+                             vocabulary_path=os.path.join(book_directory, f"vocab_{book_id}.txt"), status="normalized")
 
     def process_and_save_normalized_file(self, book_id, original_path):
+        """Normalize a book and count its words in a single pass over the raw text.
+
+        Writes ``vocab_<id>.txt`` ("word: count" lines, in order of first
+        appearance) and, unless ``write_normalized`` is off,
+        ``normalized_<id>.txt`` next to the original.
+        """
         if not os.path.exists(original_path):
             raise FileNotFoundError(f"File not found: {original_path}")
 
-        with open(original_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        book_directory = os.path.dirname(original_path)
+        new_file_path = os.path.join(book_directory, f"normalized_{book_id}.txt")
+        vocabulary_path = os.path.join(book_directory, f"vocab_{book_id}.txt")
+        vocabulary = Counter()
+
+        # Written under a temporary name and renamed, so an interrupted run
+        # never leaves a partial normalized file that later runs would skip.
+        temp_file_path = new_file_path + ".tmp"
+        with open(original_path, 'r', encoding='utf-8') as file, \
+                open(temp_file_path if self.write_normalized else os.devnull, 'w', encoding='utf-8') as new_file:
+            separator = ''
+            for words in self.normalized_chunks(file):
+                kept = [word for word in words if word not in self.STOPWORDS]
+                if kept:
+                    vocabulary.update(kept)
+                    if self.write_normalized:
+                        new_file.write(separator + ' '.join(kept))
+                        separator = ' '
+
+        # The vocabulary goes first, so a normalized file always has one.
+        temp_vocabulary_path = vocabulary_path + ".tmp"
+        with open(temp_vocabulary_path, 'w', encoding='utf-8') as vocab_file:
+            for word, count in vocabulary.items():
+                vocab_file.write(f"{word}: {count}\n")
+        os.replace(temp_vocabulary_path, vocabulary_path)
+        print(f"Vocabulary saved at: {vocabulary_path}")
+
+        if self.write_normalized:
+            os.replace(temp_file_path, new_file_path)
+            print(f"Processed file saved at: {new_file_path}")
+
+
+_worker_reader = None
 
-        normalized_text = self.normalize_text(content)
-        cleaned_text = self.remove_stopwords(normalized_text)
 
-        new_file_name = f"normalized_{book_id}.txt"
-        new_file_path = os.path.join(os.path.dirname(original_path), new_file_name)
+def init_normalize_worker(chunk_size, write_normalized):
+    global _worker_reader
+    _worker_reader = NormalizedGutenbergFileReader(chunk_size=chunk_size, write_normalized=write_normalized)
 
-        with open(new_file_path, 'w', encoding='utf-8') as new_file:
-            new_file.write(cleaned_text)
 
-        print(f"Processed file saved at: {new_file_path}")
+def normalize_book(book_id, original_path):
+    _worker_reader.process_and_save_normalized_file(book_id, original_path)
 
 
 class Controller:
-    def __init__(self, batch_size, total_books):
-        self.gutenberg_file_reader = NormalizedGutenbergFileReader()
+    def __init__(self, batch_size, total_books, workers=1, write_normalized=True, concurrency=1, rate_limit=0.0,
+                 batch_interval=150):
+        self.gutenberg_file_reader = NormalizedGutenbergFileReader(workers, write_normalized=write_normalized)
         self.batch_size = batch_size
         self.total_books = total_books
         self.ids = [None] * batch_size
-        self.batch_downloader = BatchDownloader(batch_size, self.gutenberg_file_reader, self.ids)
+        self.batch_interval = batch_interval
+        self.batch_downloader = BatchDownloader(batch_size, self.gutenberg_file_reader, self.ids,
+                                                concurrency=concurrency, rate_limit=rate_limit)
         self.guttenberg_datalake_creator = GuttenbergDatalakeCreator()
 
     def execute(self):
@@ -172,10 +405,22 @@ class Controller:
             print(f"Total books downloaded: {books_downloaded}/{self.total_books}")
 
             if books_downloaded < self.total_books:
-                print("Waiting 5 minutes for the next batch...")
-                time.sleep(150)  
+                print(f"Waiting {self.batch_interval} seconds for the next batch...")
+                time.sleep(self.batch_interval)
         print("Download complete: all books have been downloaded.")
 
 if __name__ == "__main__":
-    controller = Controller(batch_size=1, total_books=5) 
+    parser = argparse.ArgumentParser(description="Download and normalize books from Project Gutenberg.")
+    parser.add_argument('--batch-size', type=int, default=1, help="Number of books downloaded per batch.")
+    parser.add_argument('--total-books', type=int, default=5, help="Number of books to download before stopping.")
+    parser.add_argument('--concurrency', type=int, default=1, help="Download the books of a batch with this many threads.")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Minimum seconds between two requests to the same host.")
+    parser.add_argument('--batch-interval', type=float, default=150, help="Seconds to wait between batches.")
+    parser.add_argument('--workers', type=int, default=1, help="Normalize the downloaded books in parallel with this many processes.")
+    parser.add_argument('--vocabulary-only', action='store_true', help="Only write the per-book vocabularies, not the normalized texts.")
+    args = parser.parse_args()
+
+    controller = Controller(batch_size=args.batch_size, total_books=args.total_books, workers=args.workers,
+                            write_normalized=not args.vocabulary_only, concurrency=args.concurrency,
+                            rate_limit=args.rate_limit, batch_interval=args.batch_interval)
     controller.run()
\ No newline at end of file
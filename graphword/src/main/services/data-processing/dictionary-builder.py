@@ -1,6 +1,17 @@
 import os
 import re
-from collections import defaultdict
+import sys
+import json
+import struct
+import hashlib
+import argparse
+from array import array
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+
+VOCABULARY_MAGIC = b'GWVOCAB\x00'
+VOCABULARY_VERSION = 1
+VOCABULARY_HEADER = struct.Struct('<8sIIQQ')
 
 
 class VocabularyProcessor:
@@ -8,15 +19,21 @@ class VocabularyProcessor:
         self.global_vocabulary = defaultdict(int)
 
     def process_document_vocabulary(self, normalized_text):
-        word_count = defaultdict(int)
-        words = normalized_text.split()
-
-        for word in words:
-            word_count[word] += 1
-            self.global_vocabulary[word] += 1
+        word_count = Counter(normalized_text.split())
+        self.add_document_vocabulary(word_count)
+        return word_count
 
+    def add_document_vocabulary(self, word_count):
+        for word, count in word_count.items():
+            self.global_vocabulary[word] += count
         return word_count
 
+    def subtract_document_vocabulary(self, word_count):
+        for word, count in word_count.items():
+            self.global_vocabulary[word] -= count
+            if self.global_vocabulary[word] <= 0:
+                del self.global_vocabulary[word]
+
     def save_vocabulary_to_file(self, vocabulary, file_path):
         with open(file_path, 'w', encoding='utf-8') as vocab_file:
             for word, count in vocabulary.items():
@@ -32,11 +49,27 @@ class VocabularyProcessor:
         print(f"Global vocabulary saved in: {global_vocab_path}")
 
 
+def _write_section(binary_file, data):
+    if isinstance(data, array):
+        if sys.byteorder != 'little':
+            data = array(data.typecode, data)
+            data.byteswap()
+        data = data.tobytes()
+    binary_file.write(data)
+    binary_file.write(b'\x00' * (-len(data) % 8))
+
+
 class DatalakeReader:
     def __init__(self, base_directory="datalake"):
         self.base_directory = base_directory
 
     def get_normalized_files(self):
+        books = self.load_manifest()
+        if books is not None:
+            return [os.path.join(self.base_directory, entry["normalized_path"]) for entry in books.values()
+                    if entry.get("normalized_path")
+                    and os.path.exists(os.path.join(self.base_directory, entry["normalized_path"]))]
+
         normalized_files = []
         for date_dir in os.listdir(self.base_directory):
             date_path = os.path.join(self.base_directory, date_dir)
@@ -47,6 +80,65 @@ class DatalakeReader:
                         normalized_files.append(normalized_file)
         return normalized_files
 
+    def load_manifest(self):
+        # Latest entry of every book in the crawler's manifest.jsonl, or None
+        # for a datalake written before the manifest existed.
+        manifest_file = os.path.join(self.base_directory, "manifest.jsonl")
+        if not os.path.exists(manifest_file):
+            return None
+        books = {}
+        with open(manifest_file, 'r', encoding='utf-8') as manifest:
+            for line in manifest:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                books[entry["book_id"]] = entry
+        return books
+
+    def get_book_files(self):
+        # Books counted by the crawler come with a vocab_<id>.txt; older books
+        # only have their normalized text, which still has to be tokenized.
+        # The manifest may list books of dates not synced here, so the files
+        # are still checked.
+        books = self.load_manifest()
+        if books is not None:
+            book_files = []
+            for entry in books.values():
+                for key in ("vocabulary_path", "normalized_path"):
+                    if entry.get(key) and os.path.exists(os.path.join(self.base_directory, entry[key])):
+                        book_files.append(os.path.join(self.base_directory, entry[key]))
+                        break
+            return book_files
+
+        book_files = []
+        for date_dir in os.listdir(self.base_directory):
+            date_path = os.path.join(self.base_directory, date_dir)
+            if os.path.isdir(date_path):
+                for book_dir in os.listdir(date_path):
+                    vocabulary_file = os.path.join(date_path, book_dir, f"vocab_{book_dir}.txt")
+                    normalized_file = os.path.join(date_path, book_dir, f"normalized_{book_dir}.txt")
+                    if os.path.exists(vocabulary_file):
+                        book_files.append(vocabulary_file)
+                    elif os.path.exists(normalized_file):
+                        book_files.append(normalized_file)
+        return book_files
+
+    def read_vocabulary(self, file_path):
+        vocabulary = {}
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                word, count = line.rstrip('\n').rsplit(': ', 1)
+                vocabulary[word] = int(count)
+        return vocabulary
+
+    def file_hash(self, file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
     def read_file(self, file_path):
         if os.path.exists(file_path):
             with open(file_path, 'r', encoding='utf-8') as file:
@@ -71,38 +163,217 @@ class DatamartWriter:
     def save_global_vocabulary(self, vocabulary):
         global_vocab_path = os.path.join(self.base_directory, "global_vocabulary.txt")
         os.makedirs(os.path.dirname(global_vocab_path), exist_ok=True)
-        with open(global_vocab_path, 'w', encoding='utf-8') as vocab_file:
+        temp_path = global_vocab_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as vocab_file:
             for word, count in vocabulary.items():
                 vocab_file.write(f"{word}: {count}\n")
+        os.replace(temp_path, global_vocab_path)
         print(f"Global vocabulary saved in: {global_vocab_path}")
+        self.save_binary_vocabulary(vocabulary)
+        return global_vocab_path
+
+    def save_binary_vocabulary(self, vocabulary):
+        """Write the global vocabulary in the columnar form graph-builder memory-maps.
+
+        Layout (little-endian, every section padded to 8 bytes): header
+        (magic, version, longest word length, word count, word table size),
+        int64 length-bucket offsets, uint32 word offsets, UTF-8 word table and
+        int64 counts. Words are sorted by length and then alphabetically, so
+        the words of length n are the ids bucket_offsets[n]..bucket_offsets[n + 1].
+        """
+        binary_path = os.path.join(self.base_directory, "global_vocabulary.bin")
+        words = sorted(vocabulary, key=lambda word: (len(word), word))
+        max_length = len(words[-1]) if words else 0
+
+        bucket_offsets = array('q', [0] * (max_length + 2))
+        for word in words:
+            bucket_offsets[len(word) + 1] += 1
+        for length in range(1, max_length + 2):
+            bucket_offsets[length] += bucket_offsets[length - 1]
+
+        word_table = bytearray()
+        word_offsets = array('I', [0])
+        for word in words:
+            word_table += word.encode('utf-8')
+            word_offsets.append(len(word_table))
+        counts = array('q', (vocabulary[word] for word in words))
+
+        temp_path = binary_path + ".tmp"
+        with open(temp_path, 'wb') as binary_file:
+            binary_file.write(VOCABULARY_HEADER.pack(VOCABULARY_MAGIC, VOCABULARY_VERSION, max_length, len(words), len(word_table)))
+            for section in (bucket_offsets, word_offsets, bytes(word_table), counts):
+                _write_section(binary_file, section)
+        os.replace(temp_path, binary_path)
+        print(f"Binary vocabulary saved in: {binary_path}")
+        return binary_path
+
+    def load_global_vocabulary(self):
+        vocabulary = {}
+        with open(os.path.join(self.base_directory, "global_vocabulary.txt"), 'r', encoding='utf-8') as vocab_file:
+            for line in vocab_file:
+                word, count = line.rstrip('\n').rsplit(': ', 1)
+                vocabulary[word] = int(count)
+        return vocabulary
+
+    def load_counted_books(self):
+        state_file = os.path.join(self.base_directory, "counted_books.json")
+        if not os.path.exists(state_file):
+            return None
+        with open(state_file, 'r', encoding='utf-8') as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return None
+
+    def save_counted_books(self, state):
+        state_file = os.path.join(self.base_directory, "counted_books.json")
+        temp_path = state_file + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_file)
+
+
+_worker_controller = None
+
+
+def init_count_worker(datalake_directory, datamart_directory):
+    global _worker_controller
+    _worker_controller = Controller(datalake_directory, datamart_directory)
+
+
+def count_book_shard(books):
+    # Map step: count a shard of books into a partial vocabulary, in book
+    # order, and report which of them were counted.
+    return _worker_controller.count_books(books, VocabularyProcessor())
 
 
 class Controller:
-    def __init__(self, datalake_directory="datalake", datamart_directory="datamart_dictionary"):
+    def __init__(self, datalake_directory="datalake", datamart_directory="datamart_dictionary", incremental=True,
+                 workers=1):
+        self.datalake_directory = datalake_directory
+        self.datamart_directory = datamart_directory
         self.datalake_reader = DatalakeReader(datalake_directory)
         self.datamart_writer = DatamartWriter(datamart_directory)
         self.vocabulary_processor = VocabularyProcessor()
+        self.incremental = incremental
+        self.workers = workers
 
-    def process_datalake_to_datamart(self):
-        normalized_files = self.datalake_reader.get_normalized_files()
+    def load_counted_books(self):
+        """Books already in the global vocabulary, or None when it has to be rebuilt from scratch.
+
+        The saved size and mtime of global_vocabulary.txt must match the
+        file on disk; otherwise a previous run stopped between writing the
+        vocabulary and the state, and neither can be trusted.
+        """
+        if not self.incremental:
+            return None
+        state = self.datamart_writer.load_counted_books()
+        if state is None:
+            return None
+        global_vocab_path = os.path.join(self.datamart_writer.base_directory, "global_vocabulary.txt")
+        if not os.path.exists(global_vocab_path):
+            return None
+        stat = os.stat(global_vocab_path)
+        if state.get("global_vocabulary") != [stat.st_size, stat.st_mtime_ns]:
+            print("Global vocabulary does not match the counted books, rebuilding it.")
+            return None
+        return state
 
-        for file_path in normalized_files:
+    def count_books(self, books, vocabulary_processor):
+        counted = []
+        for file_path, date_dir, book_dir in books:
             try:
-                content = self.datalake_reader.read_file(file_path)
+                if os.path.basename(file_path).startswith("vocab_"):
+                    vocabulary = self.datalake_reader.read_vocabulary(file_path)
+                    doc_vocabulary = vocabulary_processor.add_document_vocabulary(vocabulary)
+                else:
+                    content = self.datalake_reader.read_file(file_path)
+                    doc_vocabulary = vocabulary_processor.process_document_vocabulary(content)
+
+                self.datamart_writer.save_document_vocabulary(doc_vocabulary, date_dir, book_dir)
+                counted.append(book_dir)
+            except Exception as e:
+                print(f"Error processing file {file_path}: {e}")
+        return vocabulary_processor.global_vocabulary, counted
 
-                doc_vocabulary = self.vocabulary_processor.process_document_vocabulary(content)
+    def count_books_parallel(self, books):
+        # Shards keep their books in order and are reduced in submission
+        # order, so the global vocabulary comes out exactly as in a
+        # sequential run while the partial vocabularies stream in.
+        shard_size = max(1, -(-len(books) // (self.workers * 4)))
+        shards = [books[i:i + shard_size] for i in range(0, len(books), shard_size)]
+        counted = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), initializer=init_count_worker,
+                                 initargs=(self.datalake_directory, self.datamart_directory)) as executor:
+            futures = [executor.submit(count_book_shard, shard) for shard in shards]
+            for future in futures:
+                partial_vocabulary, shard_counted = future.result()
+                self.vocabulary_processor.add_document_vocabulary(partial_vocabulary)
+                counted.extend(shard_counted)
+        return counted
 
+    def process_datalake_to_datamart(self):
+        state = self.load_counted_books()
+        if state is None:
+            state = {"books": {}}
+        else:
+            self.vocabulary_processor.add_document_vocabulary(self.datamart_writer.load_global_vocabulary())
+        counted_books = state["books"]
+        book_files = self.datalake_reader.get_book_files()
+        pending = []
+        pending_books = {}
+
+        for file_path in book_files:
+            try:
                 path_parts = file_path.split(os.sep)
                 date_dir = path_parts[-3]  
                 book_dir = path_parts[-2]  
 
-                self.datamart_writer.save_document_vocabulary(doc_vocabulary, date_dir, book_dir)
+                # Unchanged size and mtime skip the book without reading it;
+                # otherwise an unchanged content hash does.
+                stat = os.stat(file_path)
+                fingerprint = [file_path, stat.st_size, stat.st_mtime_ns]
+                counted = counted_books.get(book_dir)
+                if counted is not None and counted["fingerprint"] == fingerprint:
+                    continue
+                content_hash = self.datalake_reader.file_hash(file_path)
+                if counted is not None and counted["hash"] == content_hash:
+                    counted["fingerprint"] = fingerprint
+                    continue
+
+                vocabulary_path = os.path.join(date_dir, book_dir, f"vocab_{book_dir}.txt")
+                if counted is not None:
+                    # The book was replaced: take its previous counts out first.
+                    old_vocab_path = os.path.join(self.datamart_writer.base_directory, counted["vocabulary"])
+                    self.vocabulary_processor.subtract_document_vocabulary(
+                        self.datalake_reader.read_vocabulary(old_vocab_path))
+                    del counted_books[book_dir]
+                    if counted["vocabulary"] != vocabulary_path:
+                        os.remove(old_vocab_path)
+
+                pending.append((file_path, date_dir, book_dir))
+                pending_books[book_dir] = {"fingerprint": fingerprint, "hash": content_hash, "vocabulary": vocabulary_path}
             except Exception as e:
                 print(f"Error processing file {file_path}: {e}")
 
-        self.datamart_writer.save_global_vocabulary(self.vocabulary_processor.global_vocabulary)
+        if self.workers > 1 and len(pending) > 1:
+            counted = self.count_books_parallel(pending)
+        else:
+            _, counted = self.count_books(pending, self.vocabulary_processor)
+        for book_dir in counted:
+            counted_books[book_dir] = pending_books[book_dir]
+
+        global_vocab_path = self.datamart_writer.save_global_vocabulary(self.vocabulary_processor.global_vocabulary)
+        stat = os.stat(global_vocab_path)
+        state["global_vocabulary"] = [stat.st_size, stat.st_mtime_ns]
+        self.datamart_writer.save_counted_books(state)
 
 
 if __name__ == "__main__":
-    controller = Controller()
-    controller.process_datalake_to_datamart()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the per-book and global vocabularies from the datalake.")
+    parser.add_argument('--full', action='store_true', help="Ignore the counted books and recount every book.")
+    parser.add_argument('--workers', type=int, default=1, help="Count the books in parallel with this many processes.")
+    args = parser.parse_args()
+
+    controller = Controller(incremental=not args.full, workers=args.workers)
+    controller.process_datalake_to_datamart()
@@ -1,17 +1,93 @@
 import os
+import sys
 import time
+import mmap
+import heapq
+import struct
+import hashlib
+import argparse
+import tempfile
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENGINES = ("python", "numpy")
+
+CSR_MAGIC = b'GWCSR\x00\x00\x00'
+CSR_VERSION = 2
+CSR_HEADER = struct.Struct('<8sIIQQ')
+
+VOCABULARY_MAGIC = b'GWVOCAB\x00'
+VOCABULARY_VERSION = 1
+VOCABULARY_HEADER = struct.Struct('<8sIIQQ')
+
+
+class VocabularyFile:
+    """Memory-mapped view of the binary vocabulary written by dictionary-builder's save_binary_vocabulary."""
+
+    def __init__(self, file_path):
+        if sys.byteorder != 'little':
+            raise ValueError("Binary vocabulary files can only be mapped on little-endian hosts")
+        with open(file_path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.max_length, self.word_count, word_table_size = VOCABULARY_HEADER.unpack_from(self._buffer, 0)
+        if magic != VOCABULARY_MAGIC or version != VOCABULARY_VERSION:
+            raise ValueError(f"Unsupported binary vocabulary file: {file_path}")
+
+        view = memoryview(self._buffer)
+        position = VOCABULARY_HEADER.size
+        sections = []
+        for size in (8 * (self.max_length + 2), 4 * (self.word_count + 1), word_table_size, 8 * self.word_count):
+            sections.append(view[position:position + size])
+            position += size + (-size % 8)
+
+        self.bucket_offsets = sections[0].cast('q')
+        self.word_offsets = sections[1].cast('I')
+        self.word_table = sections[2]
+        self.counts = sections[3].cast('q')
+
+    def bucket(self, length):
+        """Return the words of the given length and their counts."""
+        if length > self.max_length:
+            return [], []
+        first, last = self.bucket_offsets[length], self.bucket_offsets[length + 1]
+        # Every word in the bucket has the same number of characters, so the
+        # decoded slice of the word table splits at fixed positions.
+        text = str(self.word_table[self.word_offsets[first]:self.word_offsets[last]], 'utf-8')
+        words = [text[i:i + length] for i in range(0, len(text), length)]
+        return words, self.counts[first:last].tolist()
 
 
 class WordGraphBuilder:
-    def __init__(self, input_file, output_file):
+    def __init__(self, input_file, output_file, engine="python"):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == "numpy" and np is None:
+            raise ImportError("The numpy engine requires NumPy to be installed")
         self.input_file = input_file
         self.output_file = output_file
+        self.engine = engine
         self.vocabulary = defaultdict(int)
+        self.vocabulary_file = None
+        self.length_buckets = None
         self.current_word_length = 3 
         self.relations = set()  
 
     def load_vocabulary(self):
+        binary_file = os.path.splitext(self.input_file)[0] + '.bin'
+        if os.path.exists(binary_file) and (
+                not os.path.exists(self.input_file) or os.path.getmtime(binary_file) >= os.path.getmtime(self.input_file)):
+            # Buckets are decoded on first use, so only the lengths the graph needs are read.
+            self.vocabulary_file = VocabularyFile(binary_file)
+            self.length_buckets = {}
+            return
+
         if not os.path.exists(self.input_file):
             raise FileNotFoundError(f"File not found: {self.input_file}")
 
@@ -22,6 +98,62 @@ class WordGraphBuilder:
                 count = int(count.strip())
                 self.vocabulary[word] = count
 
+    def words_of_length(self, length):
+        if self.length_buckets is None:
+            self.length_buckets = defaultdict(list)
+            for word in self.vocabulary:
+                self.length_buckets[len(word)].append(word)
+        if length not in self.length_buckets and self.vocabulary_file is not None:
+            words, counts = self.vocabulary_file.bucket(length)
+            self.vocabulary.update(zip(words, counts))
+            self.length_buckets[length] = words
+        return self.length_buckets.get(length, [])
+
+    def graph_vocabulary(self, max_word_length=7):
+        return {word: self.vocabulary[word]
+                for length in range(3, max_word_length + 1) for word in self.words_of_length(length)}
+
+    def neighbors(self, word, prefix_index, vocabulary):
+        # The index holds the masked keys of every prefix of every word, so a
+        # longer neighbor is found through its prefix of this word's length and
+        # a shorter one through this word's prefix of the neighbor's length.
+        for length in range(3, len(word) + 1):
+            prefix = word[:length]
+            for key in self.masked_keys(word, length):
+                for other in prefix_index.get(key, ()):
+                    if other in vocabulary and other[:length] != prefix and (length == len(word) or len(other) == length):
+                        yield other
+
+    def graph_delta(self, previous_vocabulary, vocabulary):
+        """Return the edges to drop and the edges to add or reweight that turn
+        the graph of previous_vocabulary into the graph of vocabulary.
+
+        Weights are count ratios, so only the edges of added, removed or
+        recounted words change.
+        """
+        removed_words = previous_vocabulary.keys() - vocabulary.keys()
+        updated_words = [word for word, count in vocabulary.items() if previous_vocabulary.get(word) != count]
+
+        prefix_index = defaultdict(list)
+        for word in previous_vocabulary.keys() | vocabulary.keys():
+            for length in range(3, len(word) + 1):
+                for key in self.masked_keys(word, length):
+                    prefix_index[key].append(word)
+
+        removed = set()
+        for word in removed_words:
+            for other in self.neighbors(word, prefix_index, previous_vocabulary):
+                removed.add((word, other))
+                removed.add((other, word))
+
+        weights = {}
+        for word in updated_words:
+            count = vocabulary[word]
+            for other in self.neighbors(word, prefix_index, vocabulary):
+                weights[(word, other)] = count / vocabulary[other]
+                weights[(other, word)] = vocabulary[other] / count
+        return removed, weights
+
     def one_letter_difference(self, word1, word2):
         if len(word1)<3 or len(word2)<3:
             return False
@@ -34,37 +166,144 @@ class WordGraphBuilder:
                     return False
         return diff_count == 1
 
+    def masked_keys(self, word, length=None):
+        length = len(word) if length is None else length
+        prefix = word[:length]
+        return [(length, i, prefix[:i] + prefix[i + 1:]) for i in range(length)]
+
+    def build_pattern_index(self, words):
+        pattern_index = defaultdict(list)
+        for word in words:
+            for key in self.masked_keys(word):
+                pattern_index[key].append(word)
+        return pattern_index
+
+    def add_relation(self, word1, word2):
+        count_word1 = self.vocabulary[word1]
+        count_word2 = self.vocabulary[word2]
+        if count_word2 != 0:
+            weight = count_word1 / count_word2
+            inverse_weight = count_word2 / count_word1
+            self.relations.add((word1, word2, weight))
+            self.relations.add((word2, word1, inverse_weight))
+
     def build_incremental_graph(self):
-        new_words = [word for word in self.vocabulary if len(word) == self.current_word_length]
-
-        for i, word1 in enumerate(new_words):
-            for word2 in new_words[i + 1:]:
-                if self.one_letter_difference(word1, word2):
-                    count_word1 = self.vocabulary[word1]
-                    count_word2 = self.vocabulary[word2]
-                    if count_word2 != 0:
-                        weight = count_word1 / count_word2
-                        inverse_weight = count_word2 / count_word1
-                        self.relations.add((word1, word2, weight))
-                        self.relations.add((word2, word1, inverse_weight))
-
-        existing_words = [word for word in self.vocabulary if len(word) < self.current_word_length]
+        if self.current_word_length < 3:
+            return
+        if self.engine == "numpy":
+            self.build_incremental_graph_numpy()
+        else:
+            self.build_incremental_graph_python()
+
+    def build_incremental_graph_python(self):
+        new_words = self.words_of_length(self.current_word_length)
+
+        # Words sharing a masked key ("c_t") differ exactly in the masked position,
+        # so only pairs inside the same bucket need to be linked.
+        for bucket in self.build_pattern_index(new_words).values():
+            for i, word1 in enumerate(bucket):
+                for word2 in bucket[i + 1:]:
+                    self.add_relation(word1, word2)
+
+        # one_letter_difference compares a longer word against a shorter one over
+        # the shorter length, so the longer word is looked up by its masked prefix.
+        existing_words = [word for length in range(3, self.current_word_length) for word in self.words_of_length(length)]
+        existing_index = self.build_pattern_index(existing_words)
+        existing_lengths = sorted({len(word) for word in existing_words})
         for word1 in new_words:
-            for word2 in existing_words:
-                if self.one_letter_difference(word1, word2):
-                    count_word1 = self.vocabulary[word1]
-                    count_word2 = self.vocabulary[word2]
-                    if count_word2 != 0:
-                        weight = count_word1 / count_word2
-                        inverse_weight = count_word2 / count_word1
-                        self.relations.add((word1, word2, weight))
-                        self.relations.add((word2, word1, inverse_weight))
+            for length in existing_lengths:
+                prefix = word1[:length]
+                for key in self.masked_keys(word1, length):
+                    for word2 in existing_index.get(key, ()):
+                        if word2 != prefix:
+                            self.add_relation(word1, word2)
 
-    def save_graph(self):
-        os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
-        with open(self.output_file, 'w', encoding='utf-8') as graph_file:
-            for word1, word2, weight in self.relations:
+    def encode_words(self, words, length):
+        codes = np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32)
+        return codes.reshape(len(words), length)
+
+    def hamming_pairs(self, left, right=None):
+        # Rows are grouped by their key with column i removed; rows sharing a key
+        # can only differ in column i. Partners inside a group are found by
+        # comparing the stably sorted keys at increasing offsets.
+        same_set = right is None
+        rows = left if same_set else np.concatenate([left, right])
+        side = np.zeros(len(rows), dtype=bool)
+        if not same_set:
+            side[len(left):] = True
+        width = rows.shape[1]
+        pairs_left, pairs_right = [], []
+
+        for i in range(width):
+            masked = np.ascontiguousarray(np.delete(rows, i, axis=1))
+            keys = masked.view(np.dtype((np.void, masked.dtype.itemsize * (width - 1)))).ravel()
+            _, inverse = np.unique(keys, return_inverse=True)
+            inverse = inverse.ravel()
+            order = np.lexsort((side, inverse))
+            sorted_keys = inverse[order]
+            sorted_side = side[order]
+
+            offset = 1
+            while offset < len(order):
+                same_key = sorted_keys[offset:] == sorted_keys[:-offset]
+                if not same_key.any():
+                    break
+                first = order[:-offset][same_key]
+                second = order[offset:][same_key]
+                if not same_set:
+                    crossing = ~sorted_side[:-offset][same_key] & sorted_side[offset:][same_key]
+                    first, second = first[crossing], second[crossing] - len(left)
+                    differs = left[first, i] != right[second, i]
+                    first, second = first[differs], second[differs]
+                pairs_left.append(first)
+                pairs_right.append(second)
+                offset += 1
+
+        if not pairs_left:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        return np.concatenate(pairs_left), np.concatenate(pairs_right)
+
+    def add_relations(self, words1, words2, first, second):
+        counts1 = np.array([self.vocabulary[words1[i]] for i in first.tolist()], dtype=np.float64)
+        counts2 = np.array([self.vocabulary[words2[i]] for i in second.tolist()], dtype=np.float64)
+        valid = counts2 != 0
+        first, second = first[valid], second[valid]
+        counts1, counts2 = counts1[valid], counts2[valid]
+        if (counts1 == 0).any():
+            raise ZeroDivisionError("float division by zero")
+
+        first_words = [words1[i] for i in first.tolist()]
+        second_words = [words2[i] for i in second.tolist()]
+        self.relations.update(zip(first_words, second_words, (counts1 / counts2).tolist()))
+        self.relations.update(zip(second_words, first_words, (counts2 / counts1).tolist()))
+
+    def build_incremental_graph_numpy(self):
+        length = self.current_word_length
+        new_words = self.words_of_length(length)
+        if not new_words:
+            return
+        new_codes = self.encode_words(new_words, length)
+
+        first, second = self.hamming_pairs(new_codes)
+        self.add_relations(new_words, new_words, first, second)
+
+        for existing_length in range(3, length):
+            existing_words = self.words_of_length(existing_length)
+            if not existing_words:
+                continue
+            existing_codes = self.encode_words(existing_words, existing_length)
+            first, second = self.hamming_pairs(new_codes[:, :existing_length], existing_codes)
+            self.add_relations(new_words, existing_words, first, second)
+
+    def write_relations(self, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as graph_file:
+            for word1, word2, weight in sorted(self.relations):
                 graph_file.write(f"{word1} {word2} {weight:.4f}\n")
+
+    def save_graph(self):
+        self.write_relations(self.output_file)
         print(f"Updated graph saved at: {self.output_file}")
 
     def expand_graph(self):
@@ -74,37 +313,301 @@ class WordGraphBuilder:
         self.current_word_length += 1
 
 
+_worker_builder = None
+
+
+def init_shard_worker(vocabulary_file, engine):
+    # Each worker maps (or parses) the vocabulary itself instead of receiving a pickled copy.
+    global _worker_builder
+    _worker_builder = WordGraphBuilder(input_file=vocabulary_file, output_file=None, engine=engine)
+    _worker_builder.load_vocabulary()
+
+
+def build_length_shard(word_length, shard_file):
+    _worker_builder.relations = set()
+    _worker_builder.current_word_length = word_length
+    _worker_builder.build_incremental_graph()
+    _worker_builder.write_relations(shard_file)
+    print(f"Shard for words of length {word_length} saved at: {shard_file}")
+    return shard_file
+
+
+def merge_shards(shard_files, output_file):
+    # Every directed edge belongs to the shard of its longest word and each shard
+    # is already sorted, so a streaming k-way merge reproduces save_graph's order.
+    temporary_file = f"{output_file}.tmp"
+    shards = [open(shard_file, 'r', encoding='utf-8') for shard_file in shard_files]
+    try:
+        with open(temporary_file, 'w', encoding='utf-8') as graph_file:
+            graph_file.writelines(heapq.merge(*shards, key=lambda line: line.split(' ', 2)[:2]))
+    finally:
+        for shard in shards:
+            shard.close()
+    os.replace(temporary_file, output_file)
+
+
+def apply_graph_delta(graph_file_path, removed, weights):
+    """Rewrite the sorted text graph with the delta applied.
+
+    Returns the (nodes, edges) counts of the updated graph.
+    """
+    new_lines = [f"{word1} {word2} {weight:.4f}\n" for (word1, word2), weight in sorted(weights.items())]
+    target_nodes = set()
+    target_edges = 0
+
+    def kept_lines(graph_file):
+        for line in graph_file:
+            parts = line.split()
+            if len(parts) != 3:
+                continue
+            edge = (parts[0], parts[1])
+            if edge not in removed and edge not in weights:
+                yield line
+
+    temporary_file = f"{graph_file_path}.tmp"
+    with open(graph_file_path, 'r', encoding='utf-8') as graph_file, \
+            open(temporary_file, 'w', encoding='utf-8') as updated_file:
+        for line in heapq.merge(kept_lines(graph_file), new_lines, key=lambda line: line.split(' ', 2)[:2]):
+            updated_file.write(line)
+            target_edges += 1
+            target_nodes.update(line.split(' ', 2)[:2])
+    os.replace(temporary_file, graph_file_path)
+    return len(target_nodes), target_edges
+
+
+def file_checksum(file_path):
+    checksum = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def save_graph_delta(delta_file_path, removed, weights, base_checksum, target_checksum, target_counts):
+    """Write the edge delta graph-query applies to the graph it is serving.
+
+    Two header lines give the SHA-256 of the word_graph.txt the delta
+    applies to and of the one it produces, followed by the produced
+    (nodes, edges) counts; then one "- word1 word2" line per dropped edge
+    and one "+ word1 word2 weight" line per added or reweighted edge.
+    """
+    temporary_file = f"{delta_file_path}.tmp"
+    with open(temporary_file, 'w', encoding='utf-8') as delta_file:
+        delta_file.write(f"# base {base_checksum}\n")
+        delta_file.write(f"# target {target_checksum} {target_counts[0]} {target_counts[1]}\n")
+        for word1, word2 in sorted(removed):
+            delta_file.write(f"- {word1} {word2}\n")
+        for (word1, word2), weight in sorted(weights.items()):
+            delta_file.write(f"+ {word1} {word2} {weight:.4f}\n")
+    os.replace(temporary_file, delta_file_path)
+    print(f"Graph delta saved at: {delta_file_path}")
+
+
+def save_vocabulary(file_path, vocabulary):
+    temporary_file = f"{file_path}.tmp"
+    with open(temporary_file, 'w', encoding='utf-8') as vocab_file:
+        for word, count in vocabulary.items():
+            vocab_file.write(f"{word}: {count}\n")
+    os.replace(temporary_file, file_path)
+
+
+def _write_section(binary_file, data):
+    if isinstance(data, array):
+        if sys.byteorder != 'little':
+            data = array(data.typecode, data)
+            data.byteswap()
+        data = data.tobytes()
+    binary_file.write(data)
+    binary_file.write(b'\x00' * (-len(data) % 8))
+
+
+def save_csr_graph(graph_file_path, binary_file_path):
+    """Write the text graph as an interned word table plus CSR adjacency.
+
+    Layout (little-endian, every section padded to 8 bytes): header
+    (magic, version, node count, edge count, word table size), uint32 word
+    offsets, UTF-8 word table, int64 edge offsets, uint32 targets and
+    float64 weights (the values parsed from word_graph.txt, so readers get
+    the same weights from either file). Node ids follow the sorted word order.
+    """
+    words = set()
+    with open(graph_file_path, 'r', encoding='utf-8') as graph_file:
+        for line in graph_file:
+            parts = line.split()
+            if len(parts) == 3:
+                words.add(parts[0])
+                words.add(parts[1])
+    words = sorted(words)
+    word_ids = {word: node_id for node_id, word in enumerate(words)}
+
+    word_table = bytearray()
+    word_offsets = array('I', [0])
+    for word in words:
+        word_table += word.encode('utf-8')
+        word_offsets.append(len(word_table))
+
+    # save_graph and merge_shards write edges sorted by (source, target) word,
+    # which is exactly CSR order, so the arrays are filled in a single pass.
+    edge_offsets = array('q', [0] * (len(words) + 1))
+    targets = array('I')
+    weights = array('d')
+    previous_edge = (-1, -1)
+    with open(graph_file_path, 'r', encoding='utf-8') as graph_file:
+        for line in graph_file:
+            parts = line.split()
+            if len(parts) == 3:
+                edge = (word_ids[parts[0]], word_ids[parts[1]])
+                if edge <= previous_edge:
+                    raise ValueError(f"Graph file is not sorted by source and target: {graph_file_path}")
+                previous_edge = edge
+                edge_offsets[edge[0] + 1] += 1
+                targets.append(edge[1])
+                weights.append(float(parts[2]))
+    for node_id in range(len(words)):
+        edge_offsets[node_id + 1] += edge_offsets[node_id]
+
+    temporary_file = f"{binary_file_path}.tmp"
+    with open(temporary_file, 'wb') as binary_file:
+        binary_file.write(CSR_HEADER.pack(CSR_MAGIC, CSR_VERSION, len(words), len(targets), len(word_table)))
+        for section in (word_offsets, bytes(word_table), edge_offsets, targets, weights):
+            _write_section(binary_file, section)
+    os.replace(temporary_file, binary_file_path)
+    print(f"Binary graph saved at: {binary_file_path}")
+
+
+def benchmark_engines(input_file, output_directory, engines=ENGINES, max_word_length=7):
+    timings = {}
+    outputs = {}
+    for engine in engines:
+        output_file = os.path.join(output_directory, f"word_graph_{engine}.txt")
+        builder = WordGraphBuilder(input_file, output_file, engine=engine)
+        builder.load_vocabulary()
+
+        start_time = time.time()
+        while builder.current_word_length <= max_word_length:
+            builder.build_incremental_graph()
+            builder.current_word_length += 1
+        timings[engine] = time.time() - start_time
+
+        builder.save_graph()
+        with open(output_file, 'rb') as graph_file:
+            outputs[engine] = graph_file.read()
+        print(f"Engine {engine}: {timings[engine]:.3f} s, {len(builder.relations)} relations")
+
+    identical = len(set(outputs.values())) <= 1
+    print(f"Outputs are {'identical' if identical else 'DIFFERENT'} across engines")
+    return timings, identical
+
+
 class Controller:
-    def __init__(self, datalake_directory, datamart_file):
+    def __init__(self, datalake_directory, datamart_file, engine="python", workers=1, delta=False):
         self.datalake_directory = datalake_directory
         self.datamart_file = datamart_file
+        self.engine = engine
+        self.workers = workers
+        self.delta = delta
+        self.binary_file = os.path.splitext(datamart_file)[0] + '.bin'
+        self.delta_file = os.path.splitext(datamart_file)[0] + '_delta.txt'
+        # The vocabulary the current graph was built from, diffed by the next delta run.
+        self.vocabulary_snapshot_file = os.path.splitext(datamart_file)[0] + '_vocabulary.txt'
         self.graph_builder = None
         self.global_vocabulary_file = os.path.join(datalake_directory, 'global_vocabulary.txt')
 
     def initialize_graph_builder(self):
         self.graph_builder = WordGraphBuilder(
             input_file=self.global_vocabulary_file,
-            output_file=self.datamart_file
+            output_file=self.datamart_file,
+            engine=self.engine
         )
 
     def execute(self):
+        if self.delta and os.path.exists(self.datamart_file) and os.path.exists(self.vocabulary_snapshot_file):
+            self.execute_delta()
+            return
+
+        # A full build supersedes the delta of any previous run.
+        if os.path.exists(self.delta_file):
+            os.remove(self.delta_file)
+
+        if self.workers > 1:
+            self.execute_parallel()
+            save_vocabulary(self.vocabulary_snapshot_file, self.graph_builder.graph_vocabulary())
+            return
+
         print("Starting incremental graph construction process...")
         self.initialize_graph_builder()
         self.graph_builder.load_vocabulary()
 
-        while True:
-            if self.graph_builder.current_word_length > 7:
-                print("All words have been processed.")
-                break
+        # Every length adds to the same relation set, so the graph is written once at the end.
+        while self.graph_builder.current_word_length <= 7:
+            print(f"Processing words of length {self.graph_builder.current_word_length}...")
+            self.graph_builder.build_incremental_graph()
+            self.graph_builder.current_word_length += 1
 
-            self.graph_builder.expand_graph()
-            print(f"Waiting 5 seconds before processing the next word length...")
-            time.sleep(5)  
+        self.graph_builder.save_graph()
+        save_csr_graph(self.datamart_file, self.binary_file)
+        save_vocabulary(self.vocabulary_snapshot_file, self.graph_builder.graph_vocabulary())
+        print("All words have been processed.")
+
+    def execute_parallel(self, max_word_length=7):
+        print(f"Starting parallel graph construction with {self.workers} workers...")
+        self.initialize_graph_builder()
+        self.graph_builder.load_vocabulary()
+
+        output_directory = os.path.dirname(self.datamart_file)
+        shard_directory = os.path.join(output_directory, 'shards')
+        os.makedirs(shard_directory, exist_ok=True)
+        word_lengths = range(self.graph_builder.current_word_length, max_word_length + 1)
+        shard_files = [os.path.join(shard_directory, f"word_graph_{length}.txt") for length in word_lengths]
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_shard_worker,
+            initargs=(self.global_vocabulary_file, self.engine)
+        ) as executor:
+            list(executor.map(build_length_shard, word_lengths, shard_files))
+
+        merge_shards(shard_files, self.datamart_file)
+        for shard_file in shard_files:
+            os.remove(shard_file)
+        os.rmdir(shard_directory)
+        print(f"Updated graph saved at: {self.datamart_file}")
+        save_csr_graph(self.datamart_file, self.binary_file)
+        print("All words have been processed.")
+
+    def execute_delta(self, max_word_length=7):
+        print("Updating the graph from the vocabulary changes...")
+        self.initialize_graph_builder()
+        self.graph_builder.load_vocabulary()
+        previous_builder = WordGraphBuilder(input_file=self.vocabulary_snapshot_file, output_file=None)
+        previous_builder.load_vocabulary()
+
+        vocabulary = self.graph_builder.graph_vocabulary(max_word_length)
+        removed, weights = self.graph_builder.graph_delta(previous_builder.vocabulary, vocabulary)
+        print(f"{len(removed)} edges removed, {len(weights)} edges added or reweighted")
+
+        base_checksum = file_checksum(self.datamart_file)
+        target_counts = apply_graph_delta(self.datamart_file, removed, weights)
+        print(f"Updated graph saved at: {self.datamart_file}")
+        save_graph_delta(self.delta_file, removed, weights, base_checksum, file_checksum(self.datamart_file), target_counts)
+        save_csr_graph(self.datamart_file, self.binary_file)
+        save_vocabulary(self.vocabulary_snapshot_file, vocabulary)
+        print("All words have been processed.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the word graph from the global vocabulary.")
+    parser.add_argument('--engine', choices=ENGINES, default="python", help="Edge generation engine.")
+    parser.add_argument('--workers', type=int, default=1, help="Build the word lengths in parallel with this many processes.")
+    parser.add_argument('--delta', action='store_true', help="Update the previous graph from the vocabulary changes instead of rebuilding it.")
+    parser.add_argument('--benchmark', action='store_true', help="Time every engine and compare their outputs.")
+    args = parser.parse_args()
+
     datalake_directory = './datamart_dictionary'
     datamart_file = './datamart_graph/word_graph.txt'
 
-    controller = Controller(datalake_directory, datamart_file)
-    controller.execute()
\ No newline at end of file
+    if args.benchmark:
+        benchmark_engines(os.path.join(datalake_directory, 'global_vocabulary.txt'), tempfile.mkdtemp(prefix='graph_benchmark_'))
+    else:
+        controller = Controller(datalake_directory, datamart_file, engine=args.engine, workers=args.workers, delta=args.delta)
+        controller.execute()
\ No newline at end of file
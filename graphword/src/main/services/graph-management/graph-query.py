@@ -1,29 +1,878 @@
 import os
+import sys
 import json
 import time
+import mmap
+import queue
+import heapq
+import random
+import hashlib
+import atexit
+import signal
+import argparse
+import threading
+import tracemalloc
+from bisect import bisect_left
+from concurrent.futures import Future
+from itertools import repeat
+import struct
+from array import array
 import networkx as nx
 import matplotlib.pyplot as plt
 import io
-from flask import Flask, jsonify, request, Response
+from collections import defaultdict, OrderedDict
+from flask import Flask, jsonify, request, Response, stream_with_context
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 app = Flask(__name__)
 
-graph = nx.DiGraph()
+CSR_MAGIC = b'GWCSR\x00\x00\x00'
+CSR_VERSION = 2
+CSR_HEADER = struct.Struct('<8sIIQQ')
+
+
+class CSRGraphFile:
+    """Memory-mapped view of the binary graph written by graph-builder's save_csr_graph."""
+
+    def __init__(self, file_path):
+        if sys.byteorder != 'little':
+            raise ValueError("Binary graph files can only be mapped on little-endian hosts")
+        with open(file_path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.node_count, self.edge_count, word_table_size = CSR_HEADER.unpack_from(self._buffer, 0)
+        if magic != CSR_MAGIC or version != CSR_VERSION:
+            raise ValueError(f"Unsupported binary graph file: {file_path}")
+
+        view = memoryview(self._buffer)
+        position = CSR_HEADER.size
+        sections = []
+        for size in (4 * (self.node_count + 1), word_table_size, 8 * (self.node_count + 1),
+                     4 * self.edge_count, 8 * self.edge_count):
+            sections.append(view[position:position + size])
+            position += size + (-size % 8)
+
+        self.word_offsets = sections[0].cast('I')
+        self.word_table = sections[1]
+        self.edge_offsets = sections[2].cast('q')
+        self.targets = sections[3].cast('I')
+        self.weights = sections[4].cast('d')
+
+    def word(self, node_id):
+        return str(self.word_table[self.word_offsets[node_id]:self.word_offsets[node_id + 1]], 'utf-8')
+
+    def edges(self):
+        words = [self.word(node_id) for node_id in range(self.node_count)]
+        for source in range(self.node_count):
+            for position in range(self.edge_offsets[source], self.edge_offsets[source + 1]):
+                yield words[source], words[self.targets[position]], self.weights[position]
+
+
+class NoPathError(Exception):
+    pass
+
+
+class GraphDeltaError(Exception):
+    pass
+
+
+SEARCH_STRATEGIES = ("dijkstra", "bidirectional", "astar")
+
+
+def hamming_heuristic(target, width):
+    """Admissible hop-count estimate for the A* search.
+
+    An edge links words that differ in one letter over their common prefix,
+    so one hop changes at most one of the first `width` letters when every
+    word in the graph has at least `width` letters.
+    """
+    prefix = target[:width]
+
+    def estimate(word):
+        if word == target:
+            return 0
+        return max(1, sum(c1 != c2 for c1, c2 in zip(word[:width], prefix)))
+    return estimate
+
+
+class NetworkXGraphBackend:
+    """Graph backend kept for comparison; stores the graph in a networkx.DiGraph."""
+
+    def __init__(self, graph=None):
+        self.graph = nx.DiGraph() if graph is None else graph
+
+    @classmethod
+    def from_edges(cls, edges):
+        graph = nx.DiGraph()
+        graph.add_weighted_edges_from(edges)
+        return cls(graph)
+
+    @classmethod
+    def from_csr_file(cls, csr_file):
+        return cls.from_edges(csr_file.edges())
+
+    def has_node(self, word):
+        return self.graph.has_node(word)
+
+    def number_of_nodes(self):
+        return self.graph.number_of_nodes()
+
+    def number_of_edges(self):
+        return self.graph.number_of_edges()
+
+    def edges(self):
+        for u, v, d in self.graph.edges(data=True):
+            yield u, v, d.get('weight', 1.0)
+
+    def path_weight(self, path):
+        return sum(self.graph[path[i]][path[i + 1]]['weight'] for i in range(len(path) - 1))
+
+    def shortest_path(self, source, target):
+        return self.search_path(source, target)[0]
+
+    def search_path(self, source, target, strategy="bidirectional"):
+        # networkx does not expose its search frontier, so nodes_expanded is None.
+        try:
+            if strategy == "bidirectional":
+                return nx.bidirectional_dijkstra(self.graph, source, target, weight='weight')[1], None
+            if strategy == "astar":
+                min_word_length = min(map(len, self.graph), default=0)
+                heuristic = hamming_heuristic(target, min_word_length)
+                return nx.astar_path(self.graph, source, target, heuristic=lambda word, _: heuristic(word),
+                                     weight=lambda u, v, d: 1), None
+            return nx.dijkstra_path(self.graph, source, target, weight='weight'), None
+        except nx.NetworkXNoPath:
+            raise NoPathError(f"No path between {source} and {target}")
+
+    def all_simple_paths(self, source, target, cutoff):
+        return nx.all_simple_paths(self.graph, source=source, target=target, cutoff=cutoff)
+
+    def all_pairs_shortest_path_length(self):
+        return nx.all_pairs_shortest_path_length(self.graph)
+
+    def shortest_path_lengths(self, source):
+        return nx.single_source_shortest_path_length(self.graph, source)
+
+    def is_symmetric(self):
+        return all(self.graph.has_edge(v, u) for u, v in self.graph.edges())
+
+    def weakly_connected_components(self):
+        return nx.weakly_connected_components(self.graph)
+
+    def degree(self):
+        return self.graph.degree()
+
+    def isolated_nodes(self):
+        return [node for node in self.graph.nodes() if self.graph.degree(node) == 0]
+
+    def filter_by_word_length(self, min_length, max_length):
+        return NetworkXGraphBackend.from_edges(
+            (u, v, w) for u, v, w in self.edges()
+            if min_length <= len(u) <= max_length and min_length <= len(v) <= max_length
+        )
+
+
+class CSRGraphBackend:
+    """Array-backed graph: integer node ids, CSR out-adjacency and a word<->id map.
+
+    Nodes are iterated in first-appearance order and both the successor and
+    the predecessor lists keep the order their edges were added, like
+    networkx.DiGraph, so each search strategy breaks ties the way the networkx
+    function it mirrors does.
+    """
+
+    def __init__(self, words, edge_offsets, targets, weights, order=None, edge_order=None):
+        self.words = words
+        self.ids = {word: node_id for node_id, word in enumerate(words)}
+        self.edge_offsets = edge_offsets
+        self.targets = targets
+        self.weights = weights
+        self.order = range(len(words)) if order is None else order
+        self.min_word_length = min(map(len, words), default=0)
+        self.build_reverse_adjacency(range(len(targets)) if edge_order is None else edge_order)
+
+    def build_reverse_adjacency(self, edge_order):
+        # Predecessor lists in CSR form, needed for in-degrees, weak connectivity
+        # and the backward search. `edge_order` lists the edge positions in the
+        # order the edges were added, which is the order networkx keeps them in
+        # its predecessor dicts; the stable sort preserves it per target.
+        sources = array('I')
+        for node_id in range(len(self.words)):
+            sources.extend(repeat(node_id, self.edge_offsets[node_id + 1] - self.edge_offsets[node_id]))
+        by_target = sorted(edge_order, key=self.targets.__getitem__)
+        sorted_targets = array('I', map(self.targets.__getitem__, by_target))
+        self.in_sources = array('I', map(sources.__getitem__, by_target))
+        self.in_positions = array('I', by_target)
+        self.in_offsets = array('q', (bisect_left(sorted_targets, node_id) for node_id in range(len(self.words) + 1)))
+
+    @classmethod
+    def from_edges(cls, edges):
+        ids = {}
+        words = []
+        sources, targets, weights = array('I'), array('I'), array('d')
+        for u, v, weight in edges:
+            for word in (u, v):
+                if word not in ids:
+                    ids[word] = len(words)
+                    words.append(word)
+            sources.append(ids[u])
+            targets.append(ids[v])
+            weights.append(weight)
+
+        # Stable counting sort of the edge list by source id.
+        edge_offsets = array('q', bytes(8 * (len(words) + 1)))
+        for source in sources:
+            edge_offsets[source + 1] += 1
+        for node_id in range(len(words)):
+            edge_offsets[node_id + 1] += edge_offsets[node_id]
+        next_position = array('q', edge_offsets[:-1])
+        sorted_targets = array('I', bytes(4 * len(targets)))
+        sorted_weights = array('d', bytes(8 * len(weights)))
+        edge_order = array('I')
+        for source, target, weight in zip(sources, targets, weights):
+            position = next_position[source]
+            sorted_targets[position] = target
+            sorted_weights[position] = weight
+            edge_order.append(position)
+            next_position[source] += 1
+        return cls(words, edge_offsets, sorted_targets, sorted_weights, edge_order=edge_order)
+
+    @classmethod
+    def from_csr_file(cls, csr_file):
+        words = [csr_file.word(node_id) for node_id in range(csr_file.node_count)]
+        # word_graph.bin numbers nodes alphabetically; networkx would have seen
+        # them in edge order (each source followed by its targets).
+        seen = bytearray(csr_file.node_count)
+        order = array('I')
+        for source in range(csr_file.node_count):
+            start, end = csr_file.edge_offsets[source], csr_file.edge_offsets[source + 1]
+            if start == end:
+                continue
+            for node_id in (source, *csr_file.targets[start:end]):
+                if not seen[node_id]:
+                    seen[node_id] = 1
+                    order.append(node_id)
+        # Offsets are copied (8 bytes per node) because they are read on every
+        # adjacency access; targets and weights stay memory-mapped.
+        return cls(words, array('q', csr_file.edge_offsets), csr_file.targets, csr_file.weights, order)
+
+    def neighbors(self, node_id):
+        return self.targets[self.edge_offsets[node_id]:self.edge_offsets[node_id + 1]]
+
+    def predecessors(self, node_id):
+        return self.in_sources[self.in_offsets[node_id]:self.in_offsets[node_id + 1]]
+
+    def has_node(self, word):
+        return word in self.ids
+
+    def number_of_nodes(self):
+        return len(self.order)
+
+    def number_of_edges(self):
+        return len(self.targets)
+
+    def edges(self):
+        for source in self.order:
+            for position in range(self.edge_offsets[source], self.edge_offsets[source + 1]):
+                yield self.words[source], self.words[self.targets[position]], self.weights[position]
+
+    def edge_weight(self, source, target):
+        for position in range(self.edge_offsets[source], self.edge_offsets[source + 1]):
+            if self.targets[position] == target:
+                return self.weights[position]
+        raise KeyError(f"No edge between {self.words[source]} and {self.words[target]}")
+
+    def path_weight(self, path):
+        node_ids = [self.ids[word] for word in path]
+        return sum(self.edge_weight(node_ids[i], node_ids[i + 1]) for i in range(len(node_ids) - 1))
+
+    def shortest_path(self, source, target):
+        return self.search_path(source, target)[0]
+
+    def search_path(self, source, target, strategy="bidirectional"):
+        source_id, target_id = self.ids[source], self.ids[target]
+        if strategy == "bidirectional":
+            path, nodes_expanded = self.bidirectional_dijkstra(source_id, target_id)
+        elif strategy == "astar":
+            path, nodes_expanded = self.astar_hops(source_id, target_id)
+        else:
+            path, nodes_expanded = self.dijkstra(source_id, target_id)
+        if path is None:
+            raise NoPathError(f"No path between {source} and {target}")
+        return [self.words[node_id] for node_id in path], nodes_expanded
+
+    def build_path(self, predecessors, node_id):
+        path = []
+        while node_id is not None:
+            path.append(node_id)
+            node_id = predecessors[node_id]
+        return path[::-1]
+
+    def dijkstra(self, source_id, target_id):
+        # Same search as networkx.dijkstra_path (push counter as tie-breaker),
+        # so ties are resolved identically.
+        distances = {}
+        seen = {source_id: 0}
+        predecessors = {source_id: None}
+        counter = 0
+        fringe = [(0, counter, source_id)]
+        while fringe:
+            distance, _, node_id = heapq.heappop(fringe)
+            if node_id in distances:
+                continue
+            distances[node_id] = distance
+            if node_id == target_id:
+                return self.build_path(predecessors, target_id), len(distances)
+            for position in range(self.edge_offsets[node_id], self.edge_offsets[node_id + 1]):
+                neighbor = self.targets[position]
+                new_distance = distance + self.weights[position]
+                if neighbor not in distances and (neighbor not in seen or new_distance < seen[neighbor]):
+                    seen[neighbor] = new_distance
+                    counter += 1
+                    heapq.heappush(fringe, (new_distance, counter, neighbor))
+                    predecessors[neighbor] = node_id
+        return None, len(distances)
+
+    def bidirectional_dijkstra(self, source_id, target_id):
+        # Forward search over out-edges from the source and backward search over
+        # in-edges from the target, alternating, as networkx.bidirectional_dijkstra,
+        # which is what nx.shortest_path runs and so the default strategy.
+        if source_id == target_id:
+            return [source_id], 0
+        distances = [{}, {}]
+        seen = [{source_id: 0}, {target_id: 0}]
+        predecessors = [{source_id: None}, {target_id: None}]
+        fringes = [[(0, 0, source_id)], [(0, 1, target_id)]]
+        counter = 1
+        best_distance, best_path = None, None
+        direction = 1
+        while fringes[0] and fringes[1]:
+            direction = 1 - direction
+            distance, _, node_id = heapq.heappop(fringes[direction])
+            if node_id in distances[direction]:
+                continue
+            distances[direction][node_id] = distance
+            if node_id in distances[1 - direction]:
+                break
+
+            if direction == 0:
+                start, end = self.edge_offsets[node_id], self.edge_offsets[node_id + 1]
+                edges = ((self.targets[position], self.weights[position]) for position in range(start, end))
+            else:
+                start, end = self.in_offsets[node_id], self.in_offsets[node_id + 1]
+                edges = ((self.in_sources[index], self.weights[self.in_positions[index]]) for index in range(start, end))
+            for neighbor, weight in edges:
+                new_distance = distance + weight
+                if neighbor not in distances[direction] and (
+                        neighbor not in seen[direction] or new_distance < seen[direction][neighbor]):
+                    seen[direction][neighbor] = new_distance
+                    counter += 1
+                    heapq.heappush(fringes[direction], (new_distance, counter, neighbor))
+                    predecessors[direction][neighbor] = node_id
+                    if neighbor in seen[1 - direction]:
+                        total_distance = seen[0][neighbor] + seen[1][neighbor]
+                        if best_distance is None or total_distance < best_distance:
+                            # The path is kept as it is when the searches meet,
+                            # like networkx, not rebuilt from the final predecessors.
+                            best_distance = total_distance
+                            forward = self.build_path(predecessors[0], neighbor)
+                            backward = self.build_path(predecessors[1], neighbor)
+                            best_path = forward + backward[::-1][1:]
+
+        return best_path, len(distances[0]) + len(distances[1])
+
+    def astar_hops(self, source_id, target_id):
+        heuristic = hamming_heuristic(self.words[target_id], self.min_word_length)
+        hops = {source_id: 0}
+        predecessors = {source_id: None}
+        expanded = set()
+        counter = 0
+        fringe = [(heuristic(self.words[source_id]), counter, source_id)]
+        while fringe:
+            _, _, node_id = heapq.heappop(fringe)
+            if node_id in expanded:
+                continue
+            expanded.add(node_id)
+            if node_id == target_id:
+                return self.build_path(predecessors, target_id), len(expanded)
+            for neighbor in self.neighbors(node_id):
+                new_hops = hops[node_id] + 1
+                if neighbor not in expanded and (neighbor not in hops or new_hops < hops[neighbor]):
+                    hops[neighbor] = new_hops
+                    predecessors[neighbor] = node_id
+                    counter += 1
+                    heapq.heappush(fringe, (new_hops + heuristic(self.words[neighbor]), counter, neighbor))
+        return None, len(expanded)
+
+    def all_simple_paths(self, source, target, cutoff):
+        source_id, target_id = self.ids[source], self.ids[target]
+        if source_id == target_id:
+            yield [source]
+            return
+        if cutoff < 1:
+            return
+        path = [source_id]
+        on_path = {source_id}
+        stack = [iter(self.neighbors(source_id))]
+        while stack:
+            child = next((node_id for node_id in stack[-1] if node_id not in on_path), None)
+            if child is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            if child == target_id:
+                yield [self.words[node_id] for node_id in path] + [target]
+            elif len(path) < cutoff:
+                path.append(child)
+                on_path.add(child)
+                stack.append(iter(self.neighbors(child)))
+
+    def bfs_lengths(self, source_id):
+        # Level-synchronous BFS; set operations keep the per-edge work in C.
+        lengths = {source_id: 0}
+        visited = {source_id}
+        level = [source_id]
+        distance = 0
+        while level:
+            distance += 1
+            next_level = set()
+            for node_id in level:
+                next_level.update(self.neighbors(node_id))
+            next_level = next_level - visited
+            visited |= next_level
+            lengths.update(dict.fromkeys(next_level, distance))
+            level = next_level
+        return lengths
+
+    def all_pairs_shortest_path_length(self):
+        for source_id in self.order:
+            lengths = self.bfs_lengths(source_id)
+            yield self.words[source_id], {self.words[node_id]: length for node_id, length in lengths.items()}
+
+    def shortest_path_lengths(self, source):
+        lengths = self.bfs_lengths(self.ids[source])
+        return {self.words[node_id]: length for node_id, length in lengths.items()}
+
+    def is_symmetric(self):
+        return all(sorted(self.neighbors(node_id)) == sorted(self.predecessors(node_id)) for node_id in self.order)
+
+    def weakly_connected_components(self):
+        seen = set()
+        for node_id in self.order:
+            if node_id in seen:
+                continue
+            component = {node_id}
+            level = [node_id]
+            remaining = self.number_of_nodes() - len(seen)
+            while level and len(component) < remaining:
+                next_level = set()
+                for current in level:
+                    next_level.update(self.neighbors(current))
+                    next_level.update(self.predecessors(current))
+                next_level = next_level - component
+                component |= next_level
+                level = next_level
+            seen |= component
+            yield {self.words[member] for member in component}
+
+    def degree(self):
+        for node_id in self.order:
+            out_degree = self.edge_offsets[node_id + 1] - self.edge_offsets[node_id]
+            in_degree = self.in_offsets[node_id + 1] - self.in_offsets[node_id]
+            yield self.words[node_id], out_degree + in_degree
+
+    def isolated_nodes(self):
+        return [node for node, degree in self.degree() if degree == 0]
+
+    def filter_by_word_length(self, min_length, max_length):
+        return CSRGraphBackend.from_edges(
+            (u, v, w) for u, v, w in self.edges()
+            if min_length <= len(u) <= max_length and min_length <= len(v) <= max_length
+        )
+
+
+GRAPH_BACKENDS = {"csr": CSRGraphBackend, "networkx": NetworkXGraphBackend}
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "csr")
+
+
+def create_graph_backend(edges=(), csr_file=None):
+    backend_class = GRAPH_BACKENDS[GRAPH_BACKEND]
+    if csr_file is not None:
+        return backend_class.from_csr_file(csr_file)
+    return backend_class.from_edges(edges)
+
+
+def eccentricity(graph, word):
+    return max(graph.shortest_path_lengths(word).values())
+
+
+def report_progress(progress, lower_bound):
+    if progress is not None:
+        progress["lower_bound"] = lower_bound
+
+
+def component_diameter(graph, component, degrees, deadline, lower_bound, progress=None):
+    """iFUB on one component of a symmetric graph.
+
+    A double sweep from the highest-degree node gives a first lower bound
+    and a path whose midpoint u is a good centre. The diameter is at most
+    2 * ecc(u); fringes of the BFS from u are visited from the farthest level
+    inwards until no deeper pair can beat the best eccentricity found. Only a
+    few BFS distance maps are alive at a time.
+    """
+    start = max(component, key=degrees.__getitem__)
+    start_lengths = graph.shortest_path_lengths(start)
+    first_end = max(start_lengths, key=start_lengths.__getitem__)
+    first_lengths = graph.shortest_path_lengths(first_end)
+    second_end = max(first_lengths, key=first_lengths.__getitem__)
+    sweep_length = first_lengths[second_end]
+    second_lengths = graph.shortest_path_lengths(second_end)
+    centre = next(word for word, length in first_lengths.items()
+                  if length == sweep_length // 2 and length + second_lengths[word] == sweep_length)
+    del start_lengths, first_lengths, second_lengths
+
+    fringes = defaultdict(list)
+    for word, length in graph.shortest_path_lengths(centre).items():
+        fringes[length].append(word)
+
+    level = max(fringes)
+    lower_bound = max(lower_bound, level, sweep_length)
+    report_progress(progress, lower_bound)
+    upper_bound = 2 * level
+    while upper_bound > lower_bound:
+        for word in fringes[level]:
+            if deadline is not None and time.time() > deadline:
+                return lower_bound, False
+            lower_bound = max(lower_bound, eccentricity(graph, word))
+            report_progress(progress, lower_bound)
+            if lower_bound >= upper_bound:
+                return lower_bound, True
+        if lower_bound > 2 * (level - 1):
+            break
+        upper_bound = 2 * (level - 1)
+        level -= 1
+    return lower_bound, True
+
+
+def directed_component_diameter(graph, component, deadline, lower_bound, progress=None):
+    # Without reverse edges the iFUB bounds do not hold, so every node's
+    # eccentricity is computed, still one BFS at a time.
+    for word in component:
+        if deadline is not None and time.time() > deadline:
+            return lower_bound, False
+        lower_bound = max(lower_bound, eccentricity(graph, word))
+        report_progress(progress, lower_bound)
+    return lower_bound, True
+
+
+def compute_diameter(graph, max_seconds=None, progress=None):
+    """Longest shortest path (in hops) of the graph, component by component.
+
+    Returns (diameter, exact). When max_seconds runs out the best lower bound
+    found so far is returned with exact set to False. A progress dict, if
+    given, holds that lower bound under "lower_bound" while the search runs.
+    """
+    deadline = None if max_seconds is None else time.time() + max_seconds
+    components = sorted(graph.weakly_connected_components(), key=len, reverse=True)
+    if not components:
+        raise ValueError("The graph has no nodes")
+
+    symmetric = graph.is_symmetric()
+    degrees = dict(graph.degree())
+    diameter = 0
+    for component in components:
+        # A component with n nodes cannot have a path longer than n - 1 hops.
+        if len(component) - 1 <= diameter:
+            break
+        if symmetric:
+            diameter, exact = component_diameter(graph, component, degrees, deadline, diameter, progress)
+        else:
+            diameter, exact = directed_component_diameter(graph, component, deadline, diameter, progress)
+        if not exact:
+            return diameter, False
+    return diameter, True
+
+
+def compute_maximum_distance(graph, progress=None):
+    return compute_diameter(graph, progress=progress)[0]
+
+
+def compute_clusters(graph, progress=None):
+    return [list(cluster) for cluster in graph.weakly_connected_components()]
+
+
+# Cheapest first, so a bounded warm-up gets as far as possible.
+ANALYTICS = {
+    "clusters": compute_clusters,
+    "maximum_distance": compute_maximum_distance,
+}
+
+
+class AnalyticsSnapshot:
+    """One version of the served graph and its graph-wide analytics, each computed at most once.
+
+    source is the SHA-256 of the word_graph.txt the graph matches, or None
+    when it matches no datamart file (empty or filtered graphs).
+    """
+
+    def __init__(self, graph, version, source=None):
+        self.graph = graph
+        self.version = version
+        self.source = source
+        self.values = {}
+        self.locks = {name: threading.Lock() for name in ANALYTICS}
+        self.progress = {name: {} for name in ANALYTICS}
+
+    def cached(self, name):
+        return self.values.get(name)
+
+    def get(self, name):
+        with self.locks[name]:
+            if name not in self.values:
+                self.values[name] = ANALYTICS[name](self.graph, self.progress[name])
+            return self.values[name]
+
+    def maximum_distance_within(self, max_seconds):
+        """Return (maximum distance, exact) spending at most about max_seconds.
+
+        A computation already running, such as the warm-up, is waited on
+        instead of being repeated; if it does not finish in time, its best
+        lower bound so far is returned.
+        """
+        deadline = time.time() + max_seconds
+        lock = self.locks["maximum_distance"]
+        if not lock.acquire(timeout=max_seconds):
+            return self.progress["maximum_distance"].get("lower_bound", 0), False
+        try:
+            if "maximum_distance" in self.values:
+                return self.values["maximum_distance"], True
+            max_distance, exact = compute_diameter(self.graph, max(deadline - time.time(), 0),
+                                                   self.progress["maximum_distance"])
+            if exact:
+                self.values["maximum_distance"] = max_distance
+            return max_distance, exact
+        finally:
+            lock.release()
+
+    def warm(self):
+        for name in ANALYTICS:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error computing {name} for graph version {self.version}: {e}")
+
+
+class GraphHolder:
+    """Serves one version of the graph at a time and swaps in new ones without blocking requests.
+
+    Requests read `current` once and keep using that snapshot until they
+    finish. New graphs are built and their analytics warmed on a single
+    loader thread, in submission order, and then published by assigning
+    `current`. Warm-up waits at most warm_timeout seconds before the swap
+    and carries on in the background after it. The first version, and
+    updates that a request is waiting on, are published right away instead.
+    """
+
+    def __init__(self, graph, cache, warm_timeout=None):
+        self.current = AnalyticsSnapshot(graph, 0)
+        self.cache = cache
+        self.warm_timeout = warm_timeout
+        self.updates = queue.Queue()
+        self.ready = threading.Event()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def update(self, build, warm=True):
+        """Queue build() on the loader thread.
+
+        build returns None to keep the current version, or a (graph, source)
+        pair that becomes the next version. The returned future resolves to
+        the snapshot served afterwards, or to the exception build raised.
+        With warm=False the new version is published without waiting for
+        its analytics.
+        """
+        future = Future()
+        self.updates.put((build, warm, future))
+        return future
+
+    def run(self):
+        while True:
+            build, warm, future = self.updates.get()
+            try:
+                future.set_result(self.swap(build, warm))
+            except Exception as e:
+                print(f"Error loading a new graph version: {e}")
+                future.set_exception(e)
+            self.ready.set()
+
+    def swap(self, build, warm=True):
+        result = build()
+        if result is None:
+            return self.current
+
+        new_graph, source = result
+        snapshot = AnalyticsSnapshot(new_graph, self.current.version + 1, source)
+        warmer = threading.Thread(target=snapshot.warm, daemon=True)
+        warmer.start()
+        if warm and self.ready.is_set():
+            warmer.join(self.warm_timeout)
+        self.current = snapshot
+        # Cached results are keyed by version, so the old entries can no longer be hit.
+        self.cache.clear()
+        print(f"Serving graph version {snapshot.version} with {new_graph.number_of_nodes()} nodes and {new_graph.number_of_edges()} edges")
+        return snapshot
+
+    def wait(self):
+        """Block until every queued update has been served."""
+        return self.update(lambda: None).result()
+
+
+class ResultCache:
+    """Bounded LRU cache of route results with an optional time to live."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[0] > self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class EventLog:
+    """Append-only NDJSON event sink, buffered in memory and flushed in batches.
+
+    Events go to ``<base_directory>/<YYYYMMDD>/events.ndjson``, one JSON object
+    per line, so a new day starts a new file. Each batch is written with a
+    single ``O_APPEND`` write under an exclusive ``flock``, which keeps lines
+    from several worker processes from interleaving.
+    """
+
+    def __init__(self, base_directory=os.path.join('datalake', 'events'), flush_interval=1.0, max_buffer=1000):
+        self.base_directory = base_directory
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def append(self, event):
+        with self.lock:
+            self.buffer.append((time.strftime('%Y%m%d'), event))
+            full = len(self.buffer) >= self.max_buffer
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                events, self.buffer = self.buffer, []
+            if not events:
+                return
+            by_day = defaultdict(list)
+            for day, event in events:
+                by_day[day].append(json.dumps(event) + "\n")
+            for day, lines in by_day.items():
+                try:
+                    self.write(day, "".join(lines).encode('utf-8'))
+                except OSError as e:
+                    print(f"Error writing {len(lines)} events for {day}: {e}")
+
+    def write(self, day, data):
+        daily_folder = os.path.join(self.base_directory, day)
+        os.makedirs(daily_folder, exist_ok=True)
+        fd = os.open(os.path.join(daily_folder, 'events.ndjson'), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
+
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 1024))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 0)) or None
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", 1.0))
+GRAPH_WARM_TIMEOUT = float(os.getenv("GRAPH_WARM_TIMEOUT", 60)) or None
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+graph_holder = GraphHolder(create_graph_backend(), result_cache, GRAPH_WARM_TIMEOUT)
+event_log = EventLog(flush_interval=EVENT_FLUSH_INTERVAL)
+
+
+def wants_ndjson():
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+def ndjson_line(item):
+    return json.dumps(item) + "\n"
+
+
+def ndjson_response(lines):
+    """Stream newline-delimited JSON as the generator produces it, without buffering the result."""
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
 
 
 def log_event(endpoint, params, status_code, processing_time=None, additional_data=None):
 
     if endpoint == "/health":
         return
-    current_date = time.strftime('%Y%m%d')
-    daily_folder = os.path.join('datalake', 'events', current_date)
-    os.makedirs(daily_folder, exist_ok=True) 
-
-    daily_log_file = os.path.join(daily_folder, 'events.json')
-
-    if not os.path.exists(daily_log_file):
-        with open(daily_log_file, 'w') as f:
-            json.dump([], f)
 
     event = {
         "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
@@ -37,18 +886,8 @@ def log_event(endpoint, params, status_code, processing_time=None, additional_da
         "user_agent": request.headers.get('User-Agent'),
         "additional_data": additional_data or {}
     }
+    event_log.append(event)
 
-    try:
-        with open(daily_log_file, 'r+') as f:
-            logs = json.load(f)  
-            logs.append(event)  
-            f.seek(0)  
-            json.dump(logs, f, indent=4)  
-            f.truncate()  
-    except json.JSONDecodeError:
-        with open(daily_log_file, 'w') as f:
-            json.dump([event], f, indent=4)
-            
 
 @app.before_request
 def log_request():
@@ -61,12 +900,77 @@ def log_request():
         params = request.args.to_dict()
         log_event(endpoint, params, None)  
 
+
+@app.before_request
+def require_graph():
+    # Until the first load finishes the served graph is empty, and every
+    # graph route would answer as if the words did not exist.
+    if not graph_holder.ready.is_set() and request.endpoint not in ('home', 'cache_stats'):
+        return jsonify({'error': 'The graph is still loading'}), 503
+
 import glob
 
+def read_text_edges(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) == 3:
+                palabra1, palabra2, peso = parts
+                yield palabra1, palabra2, float(peso)
+
+
+GRAPH_DELTA_FILE = os.path.join('datamart_graph', 'word_graph_delta.txt')
+
+
+def read_graph_delta(file_path):
+    """Parse the edge delta written by graph-builder's save_graph_delta."""
+    header = {}
+    removed = set()
+    weights = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == '#':
+                header[parts[1]] = parts[2:]
+            elif parts[0] == '-':
+                removed.add((parts[1], parts[2]))
+            elif parts[0] == '+':
+                weights[(parts[1], parts[2])] = float(parts[3])
+    base_checksum = header['base'][0]
+    target_checksum, nodes, edges = header['target']
+    return base_checksum, target_checksum, [int(nodes), int(edges)], removed, weights
+
+
+def file_checksum(file_path):
+    checksum = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def graph_with_delta(current_graph, removed, weights):
+    # Rebuilt from the served graph's own edges, so nothing is read from disk
+    # and requests keep using current_graph until graph_holder swaps it out.
+    # Surviving edges keep their order; new edges are appended.
+    weights = dict(weights)
+
+    def edges():
+        for u, v, weight in current_graph.edges():
+            if (u, v) not in removed:
+                yield u, v, weights.pop((u, v), weight)
+        for (u, v), weight in weights.items():
+            yield u, v, weight
+
+    return type(current_graph).from_edges(edges())
+
+
 def cargar_grafo_desde_txt():
-    global graph, original_graph
     base_path = 'datamart_graph'
     original_file = os.path.join(base_path, 'word_graph.txt')
+    binary_file = os.path.join(base_path, 'word_graph.bin')
     script_directory = os.path.dirname(os.path.abspath(__file__))
 
     filtered_graph_files = glob.glob(os.path.join(script_directory, "filtered_graph_*.txt"))
@@ -75,6 +979,10 @@ def cargar_grafo_desde_txt():
         filtered_graph_file = sorted(filtered_graph_files)[-1]
         file_path = filtered_graph_file
         print(f"Filtered graph file found: {file_path}")
+    elif os.path.exists(binary_file) and (
+            not os.path.exists(original_file) or os.path.getmtime(binary_file) >= os.path.getmtime(original_file)):
+        file_path = binary_file
+        print(f"Binary graph file found: {file_path}")
     else:
         file_path = original_file
         print(f"No filtered graphs found. Using original file: {file_path}")
@@ -84,35 +992,52 @@ def cargar_grafo_desde_txt():
     if not os.path.exists(file_path):
         print(f"File {file_path} not found. Creating an empty file...")
         open(file_path, 'w').close() 
-        return 
+        return None
 
-    graph = nx.DiGraph()
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split()
-            if len(parts) == 3:
-                palabra1, palabra2, peso = parts
-                graph.add_edge(palabra1, palabra2, weight=float(peso))
+    csr_file = None
+    if file_path == binary_file:
+        try:
+            csr_file = CSRGraphFile(file_path)
+        except ValueError as e:
+            # e.g. a file written by an older graph-builder with another layout.
+            if not os.path.exists(original_file):
+                raise
+            print(f"{e}. Using original file: {original_file}")
+            file_path = original_file
+
+    if csr_file is not None:
+        new_graph = create_graph_backend(csr_file=csr_file)
+    else:
+        new_graph = create_graph_backend(read_text_edges(file_path))
+
+    # word_graph.bin is written from word_graph.txt, so both identify the
+    # graph by the text file's checksum; graph deltas are matched against it.
+    source = None
+    if file_path in (original_file, binary_file) and os.path.exists(original_file):
+        source = file_checksum(original_file)
 
-    original_graph = graph.copy()  
     print(f"Graph loaded from: {file_path}")
+    return new_graph, source
 
 
-cargar_grafo_desde_txt()
+# Requests are served (from an empty graph) while the first version loads.
+graph_holder.update(cargar_grafo_desde_txt)
 
 @app.route('/')
 def home():
     routes = [
-        {"path": "/shortest-path?origen=<node>&destino=<node>", "description": "Find the shortest path between two nodes."},
-        {"path": "/all-paths?origen=<node>&destino=<node>&max_depth=<number>&max_paths=<number>", "description": "Find possible paths between two nodes with optional limits on maximum length and number of paths."},
-        {"path": "/maximum-distance", "description": "Calculate the maximum distance between nodes."},
-        {"path": "/clusters", "description": "Display the graph's clusters."},
+        {"path": "/shortest-path?origen=<node>&destino=<node>&strategy=<dijkstra|bidirectional|astar>", "description": "Find the shortest path between two nodes (bidirectional by default). astar finds the path with the fewest hops."},
+        {"path": "/all-paths?origen=<node>&destino=<node>&max_depth=<number>&max_paths=<number>&stream=<0|1>", "description": "Find possible paths between two nodes with optional limits on maximum length and number of paths. With stream=1 (or Accept: application/x-ndjson) each path is sent as one JSON line."},
+        {"path": "/maximum-distance", "description": "Calculate the maximum distance between nodes. Add max_seconds=<number> to bound the computation time."},
+        {"path": "/clusters?stream=<0|1>", "description": "Display the graph's clusters. With stream=1 (or Accept: application/x-ndjson) each cluster is sent as one JSON line."},
         {"path": "/high-connectivity-nodes?min=<number>", "description": "List nodes with high connectivity."},
         {"path": "/nodes-by-degree?degree=<number>", "description": "List nodes with a specific degree."},
         {"path": "/isolated-nodes", "description": "List isolated nodes in the graph."},
         {"path": "/health", "description": "Check if the API is running correctly."},
+        {"path": "/cache-stats", "description": "Show hit and miss counters of the path result cache."},
         {"path": "/filter-graph?min=<length>&max=<length>", "description": "Filter the graph by word length and display the filtered nodes and edges."},
-        {"path": "/reset-graph", "description": "Reset the graph to its original state."}
+        {"path": "/reset-graph", "description": "Reset the graph to its original state."},
+        {"path": "/apply-delta", "description": "Apply the edge delta of the last incremental graph build to the served graph."}
     ]
 
     html = """
@@ -179,23 +1104,40 @@ def shortest_path():
     start_time = time.time()
     origen = request.args.get('origen')
     destino = request.args.get('destino')
-    params = {"origen": origen, "destino": destino}
+    strategy = request.args.get('strategy', 'bidirectional')
+    params = {"origen": origen, "destino": destino, "strategy": strategy}
+
+    if strategy not in SEARCH_STRATEGIES:
+        processing_time = time.time() - start_time
+        log_event('/shortest-path', params, 400, processing_time, {"error": "Unknown search strategy"})
+        return jsonify({'error': f"Unknown search strategy. Use one of: {', '.join(SEARCH_STRATEGIES)}"}), 400
 
-    if not (graph.has_node(origen) and graph.has_node(destino)):
+    snapshot = graph_holder.current
+    current_graph = snapshot.graph
+    if not (current_graph.has_node(origen) and current_graph.has_node(destino)):
         processing_time = time.time() - start_time
         log_event('/shortest-path', params, 404, processing_time, {"error": "One or both nodes do not exist"})
         return jsonify({'error': 'One or both nodes do not exist'}), 404
 
-    try:
-        path = nx.shortest_path(graph, source=origen, target=destino, weight='weight')
-        total_weight = sum(graph[path[i]][path[i + 1]]['weight'] for i in range(len(path) - 1))
-        processing_time = time.time() - start_time
-        log_event('/shortest-path', params, 200, processing_time, {"path": path, "total_weight": total_weight})
-        return jsonify({'path': path, 'total_weight': total_weight}), 200
-    except nx.NetworkXNoPath:
-        processing_time = time.time() - start_time
-        log_event('/shortest-path', params, 404, processing_time, {"error": "No path exists between the nodes"})
-        return jsonify({'error': 'No path exists between the nodes'}), 404
+    key = (snapshot.version, '/shortest-path', origen, destino, strategy)
+    result = result_cache.get(key)
+    if result is None:
+        try:
+            path, nodes_expanded = current_graph.search_path(origen, destino, strategy)
+            result = (200, {
+                'path': path,
+                'total_weight': current_graph.path_weight(path),
+                'strategy': strategy,
+                'nodes_expanded': nodes_expanded
+            })
+        except NoPathError:
+            result = (404, {'error': 'No path exists between the nodes'})
+        result_cache.put(key, result)
+
+    status_code, response = result
+    processing_time = time.time() - start_time
+    log_event('/shortest-path', params, status_code, processing_time, response)
+    return jsonify(response), status_code
 
 
 @app.route('/all-paths', methods=['GET'])
@@ -207,25 +1149,61 @@ def all_paths():
     max_paths = int(request.args.get('max_paths', 50)) 
     params = {"origen": origen, "destino": destino}
 
-    if not (graph.has_node(origen) and graph.has_node(destino)):
+    snapshot = graph_holder.current
+    current_graph = snapshot.graph
+    if not (current_graph.has_node(origen) and current_graph.has_node(destino)):
         processing_time = time.time() - start_time
         log_event('/all-paths', params, 404, processing_time, {"error": "One or both nodes do not exist"})
         return jsonify({'error': 'One or both nodes do not exist'}), 404
 
+    if wants_ndjson():
+        key = (snapshot.version, '/all-paths', origen, destino, max_depth, max_paths)
+        cached = result_cache.get(key)
+
+        def generate():
+            count = 0
+            try:
+                if cached is not None:
+                    weighted_paths = iter(cached['weighted_paths'])
+                else:
+                    weighted_paths = (
+                        {'path': path, 'total_weight': current_graph.path_weight(path)}
+                        for path in current_graph.all_simple_paths(origen, destino, max_depth)
+                    )
+                for weighted_path in weighted_paths:
+                    if count >= max_paths:
+                        break
+                    yield ndjson_line(weighted_path)
+                    count += 1
+            except Exception as e:
+                processing_time = time.time() - start_time
+                log_event('/all-paths', params, 500, processing_time, {"error": str(e), "paths_count": count})
+                yield ndjson_line({'error': 'Internal server error'})
+                return
+            processing_time = time.time() - start_time
+            log_event('/all-paths', params, 200, processing_time, {"paths_count": count, "stream": True})
+
+        return ndjson_response(generate())
+
     try:
-        paths = []
-        for path in nx.all_simple_paths(graph, source=origen, target=destino, cutoff=max_depth):
-            if len(paths) >= max_paths:
-                break
-            weighted_path = {
-                'path': path,
-                'total_weight': sum(graph[path[i]][path[i + 1]]['weight'] for i in range(len(path) - 1))
-            }
-            paths.append(weighted_path)
+        key = (snapshot.version, '/all-paths', origen, destino, max_depth, max_paths)
+        response = result_cache.get(key)
+        if response is None:
+            paths = []
+            for path in current_graph.all_simple_paths(origen, destino, max_depth):
+                if len(paths) >= max_paths:
+                    break
+                weighted_path = {
+                    'path': path,
+                    'total_weight': current_graph.path_weight(path)
+                }
+                paths.append(weighted_path)
+            response = {'weighted_paths': paths}
+            result_cache.put(key, response)
 
         processing_time = time.time() - start_time
-        log_event('/all-paths', params, 200, processing_time, {"weighted_paths": paths})
-        return jsonify({'weighted_paths': paths}), 200
+        log_event('/all-paths', params, 200, processing_time, response)
+        return jsonify(response), 200
     except Exception as e:
         processing_time = time.time() - start_time
         log_event('/all-paths', params, 500, processing_time, {"error": str(e)})
@@ -235,76 +1213,173 @@ def all_paths():
 @app.route('/maximum-distance', methods=['GET'])
 def maximum_distance():
     start_time = time.time()
+    max_seconds = request.args.get('max_seconds')
+    params = {} if max_seconds is None else {"max_seconds": max_seconds}
+    if max_seconds is not None:
+        try:
+            max_seconds = float(max_seconds)
+            if not 0 <= max_seconds <= threading.TIMEOUT_MAX:
+                raise ValueError(max_seconds)
+        except ValueError:
+            processing_time = time.time() - start_time
+            log_event('/maximum-distance', params, 400, processing_time, {"error": "Invalid max_seconds"})
+            return jsonify({'error': 'max_seconds must be a non-negative number'}), 400
+
     try:
-        all_distances = dict(nx.all_pairs_shortest_path_length(graph))
-        max_distance = max(max(distances.values()) for distances in all_distances.values())
+        snapshot = graph_holder.current
+        exact = True
+        if max_seconds is None:
+            max_distance = snapshot.get("maximum_distance")
+        else:
+            max_distance, exact = snapshot.maximum_distance_within(max_seconds)
+        response = {'maximum_distance': max_distance}
+        if not exact:
+            response['approximate'] = True
         processing_time = time.time() - start_time
-        log_event('/maximum-distance', {}, 200, processing_time, {"maximum_distance": max_distance})
-        return jsonify({'maximum_distance': max_distance}), 200
+        log_event('/maximum-distance', params, 200, processing_time, response)
+        return jsonify(response), 200
     except Exception as e:
         processing_time = time.time() - start_time
-        log_event('/maximum-distance', {}, 500, processing_time, {"error": str(e)})
+        log_event('/maximum-distance', params, 500, processing_time, {"error": str(e)})
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    stats = result_cache.stats()
+    stats["graph_version"] = graph_holder.current.version
+    return jsonify(stats), 200
+
 @app.route('/health', methods=['GET'])
 def health():
     return "OK", 200
 
 @app.route('/filter-graph', methods=['GET'])  
 def filter_graph():
-    global graph  
-
     longitud_min = int(request.args.get('min', 1))  
     longitud_max = int(request.args.get('max', 10)) 
 
-    subgraph = nx.DiGraph()
-
-    for u, v, d in graph.edges(data=True):
-        if longitud_min <= len(u) <= longitud_max and longitud_min <= len(v) <= longitud_max:
-            subgraph.add_edge(u, v, **d)
-
-    graph = subgraph
-
     script_directory = os.path.dirname(os.path.abspath(__file__))
 
     filtered_graph_file = os.path.join(script_directory, f"filtered_graph_{longitud_min}_{longitud_max}.txt")
-    
-    with open(filtered_graph_file, 'w', encoding='utf-8') as f:
-        for u, v, d in subgraph.edges(data=True):
-            weight = d.get('weight', 1.0)  
-            f.write(f"{u} {v} {weight}\n")
+
+    def build():
+        # Runs on the loader, so it filters the graph left by every update queued before it.
+        subgraph = graph_holder.current.graph.filter_by_word_length(longitud_min, longitud_max)
+        with open(filtered_graph_file, 'w', encoding='utf-8') as f:
+            for u, v, weight in subgraph.edges():
+                f.write(f"{u} {v} {weight}\n")
+        return subgraph, None
+
+    try:
+        subgraph = graph_holder.update(build, warm=False).result().graph
+    except Exception as e:
+        return jsonify({'error': f'Error filtering the graph: {e}'}), 500
 
     return jsonify({
         "status": "success",
         "message": f"Filtered graph saved as {filtered_graph_file} with words of length between {longitud_min} and {longitud_max}",
-        "nodes_count": len(graph.nodes),
-        "edges_count": len(graph.edges),
+        "nodes_count": subgraph.number_of_nodes(),
+        "edges_count": subgraph.number_of_edges(),
         "file_path": filtered_graph_file
     })
 
 @app.route('/reset-graph', methods=['GET'])
 def reset_graph():
-    global graph, original_graph
     script_directory = os.path.dirname(os.path.abspath(__file__))
 
-    for filename in os.listdir(script_directory):
-        if filename.startswith("filtered_graph_") and filename.endswith(".txt"):
-            file_path = os.path.join(script_directory, filename)
-            try:
-                os.remove(file_path)
-                print(f"File deleted: {file_path}")
-            except Exception as e:
-                print(f"Error deleting file {file_path}: {e}")
+    def build():
+        for filename in os.listdir(script_directory):
+            if filename.startswith("filtered_graph_") and filename.endswith(".txt"):
+                file_path = os.path.join(script_directory, filename)
+                try:
+                    os.remove(file_path)
+                    print(f"File deleted: {file_path}")
+                except Exception as e:
+                    print(f"Error deleting file {file_path}: {e}")
+        return cargar_grafo_desde_txt()
+
+    try:
+        snapshot = graph_holder.update(build, warm=False).result()
+    except Exception as e:
+        return jsonify({'error': f'Error reloading the original graph: {e}'}), 500
+
+    return jsonify({
+        "status": "success",
+        "message": "Filtered graph files deleted and the original graph reloaded.",
+        "nodes_count": snapshot.graph.number_of_nodes(),
+        "edges_count": snapshot.graph.number_of_edges()
+    })
+
+@app.route('/apply-delta', methods=['GET'])
+def apply_delta():
+    if not os.path.exists(GRAPH_DELTA_FILE):
+        return jsonify({'error': 'No graph delta found'}), 404
+
+    base_checksum, target_checksum, target_counts, removed, weights = read_graph_delta(GRAPH_DELTA_FILE)
+    original_file = os.path.join('datamart_graph', 'word_graph.txt')
+    if not os.path.exists(original_file) or file_checksum(original_file) != target_checksum:
+        return jsonify({'error': 'Graph delta does not belong to the current word_graph.txt'}), 409
 
-    cargar_grafo_desde_txt()
-    return jsonify({"status": "success", "message": "Graph reset to original state and filtered graph files deleted."})
+    applied = []
+
+    def build():
+        # Checked on the loader against the graph left by every update queued before it.
+        current = graph_holder.current
+        if current.source == target_checksum:
+            return None
+        if current.source != base_checksum:
+            raise GraphDeltaError('Graph delta does not apply to the served graph')
+        updated_graph = graph_with_delta(current.graph, removed, weights)
+        if [updated_graph.number_of_nodes(), updated_graph.number_of_edges()] != target_counts:
+            raise GraphDeltaError('Graph delta produced an unexpected graph')
+        applied.append(True)
+        return updated_graph, target_checksum
+
+    try:
+        snapshot = graph_holder.update(build, warm=False).result()
+    except GraphDeltaError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'error': f'Error applying the graph delta: {e}'}), 500
+
+    if applied:
+        message = f"Graph delta applied: {len(removed)} edges removed, {len(weights)} edges added or reweighted"
+    else:
+        message = "Graph is already up to date."
+    return jsonify({
+        "status": "success",
+        "message": message,
+        "nodes_count": snapshot.graph.number_of_nodes(),
+        "edges_count": snapshot.graph.number_of_edges()
+    })
 
 @app.route('/clusters', methods=['GET'])
 def clusters():
     start_time = time.time()
+    if wants_ndjson():
+        snapshot = graph_holder.current
+        cached = snapshot.cached("clusters")
+
+        def generate():
+            count = 0
+            try:
+                components = cached if cached is not None else snapshot.graph.weakly_connected_components()
+                for component in components:
+                    yield ndjson_line({'cluster': list(component)})
+                    count += 1
+            except Exception as e:
+                processing_time = time.time() - start_time
+                log_event('/clusters', {}, 500, processing_time, {"error": str(e), "clusters_count": count})
+                yield ndjson_line({'error': 'Internal server error'})
+                return
+            yield ndjson_line({'total_clusters': count})
+            processing_time = time.time() - start_time
+            log_event('/clusters', {}, 200, processing_time, {"clusters_count": count, "stream": True})
+
+        return ndjson_response(generate())
+
     try:
-        cluster_list = list(nx.weakly_connected_components(graph))
-        clusters = [list(cluster) for cluster in cluster_list]
+        clusters = graph_holder.current.get("clusters")
         processing_time = time.time() - start_time
         log_event('/clusters', {}, 200, processing_time, {"clusters_count": len(clusters)})
         return jsonify({'clusters': clusters, 'total_clusters': len(clusters)}), 200
@@ -319,7 +1394,7 @@ def high_connectivity_nodes():
     min_connections = int(request.args.get('min', 1)) 
     params = {"min_connections": min_connections}
     try:
-        high_connectivity = [node for node, degree in graph.degree() if degree >= min_connections]
+        high_connectivity = [node for node, degree in graph_holder.current.graph.degree() if degree >= min_connections]
         processing_time = time.time() - start_time
         log_event('/high-connectivity-nodes', params, 200, processing_time, {"nodes_count": len(high_connectivity)})
         return jsonify({'high_connectivity_nodes': high_connectivity}), 200
@@ -334,7 +1409,7 @@ def nodes_by_degree():
     degree = int(request.args.get('degree'))
     params = {"degree": degree}
     try:
-        nodes = [node for node, deg in graph.degree() if deg == degree]
+        nodes = [node for node, deg in graph_holder.current.graph.degree() if deg == degree]
         processing_time = time.time() - start_time
         log_event('/nodes-by-degree', params, 200, processing_time, {"nodes_count": len(nodes)})
         return jsonify({'nodes': nodes}), 200
@@ -347,7 +1422,7 @@ def nodes_by_degree():
 def isolated_nodes():
     start_time = time.time()
     try:
-        isolated = [node for node in graph.nodes() if graph.degree(node) == 0]
+        isolated = graph_holder.current.graph.isolated_nodes()
         processing_time = time.time() - start_time
         log_event('/isolated-nodes', {}, 200, processing_time, {"isolated_nodes_count": len(isolated)})
         return jsonify({'isolated_nodes': isolated}), 200
@@ -357,5 +1432,82 @@ def isolated_nodes():
         return jsonify({'error': 'Internal server error'}), 500
 
 
+def benchmark_backends(file_path, samples=50, max_depth=5, max_paths=50):
+    # Let the background load and warm-up of the served graph finish so they
+    # do not compete with the measurements.
+    graph_holder.wait()
+    graph_holder.current.warm()
+    results = {}
+    for backend_name, backend_class in GRAPH_BACKENDS.items():
+        tracemalloc.start()
+        start_time = time.time()
+        if file_path.endswith('.bin'):
+            backend = backend_class.from_csr_file(CSRGraphFile(file_path))
+        else:
+            backend = backend_class.from_edges(read_text_edges(file_path))
+        load_time = time.time() - start_time
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        words = sorted(word for word, _ in backend.degree())
+        rng = random.Random(0)
+        pairs = [(rng.choice(words), rng.choice(words)) for _ in range(samples)]
+        timings = {}
+        expansions = {}
+
+        for strategy in SEARCH_STRATEGIES:
+            start_time = time.time()
+            nodes_expanded = 0
+            for origen, destino in pairs:
+                try:
+                    path, expanded = backend.search_path(origen, destino, strategy)
+                    backend.path_weight(path)
+                    nodes_expanded += expanded or 0
+                except NoPathError:
+                    pass
+            timings[f"shortest_path_{strategy}"] = (time.time() - start_time) / samples
+            if nodes_expanded:
+                expansions[strategy] = nodes_expanded / samples
+
+        start_time = time.time()
+        for origen, destino in pairs:
+            for i, path in enumerate(backend.all_simple_paths(origen, destino, max_depth)):
+                if i >= max_paths:
+                    break
+                backend.path_weight(path)
+        timings["all_paths"] = (time.time() - start_time) / samples
+
+        for name, query in (("clusters", lambda: list(backend.weakly_connected_components())),
+                            ("degree", lambda: list(backend.degree()))):
+            start_time = time.time()
+            query()
+            timings[name] = time.time() - start_time
+
+        edges = max(backend.number_of_edges(), 1)
+        results[backend_name] = {
+            "load_time": load_time,
+            "bytes_per_edge": memory / edges,
+            "latency": timings,
+            "nodes_expanded": expansions
+        }
+        print(f"Backend {backend_name}: loaded in {load_time:.3f} s, {memory / edges:.1f} bytes per edge")
+        for name, seconds in timings.items():
+            print(f"  {name}: {seconds * 1000:.3f} ms")
+        for strategy, nodes in expansions.items():
+            print(f"  {strategy}: {nodes:.1f} nodes expanded per query")
+    return results
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Graph query API.")
+    parser.add_argument('--benchmark', metavar='GRAPH_FILE', help="Compare the graph backends on a graph file instead of serving.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_backends(args.benchmark)
+    else:
+        # Exit through sys.exit on SIGTERM so buffered events are flushed.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        # SIGHUP picks up a fresh word_graph.txt/.bin without a restart.
+        signal.signal(signal.SIGHUP, lambda signum, frame: graph_holder.update(cargar_grafo_desde_txt))
+        app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
@@ -1,74 +1,342 @@
 import os
 import json
-from collections import defaultdict
-from statistics import mean, median
+import math
+import argparse
+from datetime import datetime, timedelta
+
+COUNTERS = (
+    "requests_by_endpoint",
+    "requests_by_method",
+    "status_code_distribution",
+    "requests_by_ip",
+    "user_agents",
+    "error_requests",
+)
+
+# Rollup buckets are keyed by a prefix of the event timestamp
+# ("YYYY-MM-DD HH:MM:SS"): "YYYY-MM-DD HH" for hours, "YYYY-MM-DD" for days.
+ROLLUP_GRANULARITIES = {"hour": 13, "day": 10}
+# Days of buckets kept, counted back from the newest one, so the state and
+# rollups.json stop growing with the traffic history.
+ROLLUP_RETENTION_DAYS = {"hour": 30, "day": 365}
+
+
+def stat_key(value):
+    # Aggregates are persisted as JSON, whose object keys are always strings;
+    # use the key json.dump would have written so old and new events agree.
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+class QuantileSketch:
+    """Mergeable DDSketch of positive values with a bounded relative error.
+
+    Each value is counted in the bucket ``ceil(log(x) / log(gamma))``, so any
+    quantile is returned within ``relative_accuracy`` of the true value.
+    Sketches with the same accuracy merge by adding their bucket counts. The
+    number of buckets only depends on the range of the values and is capped
+    at ``max_bins`` by folding the lowest buckets together.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        if value > 1e-9:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self.collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self.collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def collapse(self):
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        folded = sum(self.bins.pop(index) for index in indexes[:excess])
+        self.bins[indexes[excess]] += folded
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        if self.count == 0:
+            return None
+        return {
+            "average": self.sum / self.count,
+            "median": self.quantile(0.5),
+            "max": self.max,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "count": self.count,
+        }
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "zero_count": self.zero_count,
+            "bins": {str(index): count for index, count in sorted(self.bins.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"])
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.zero_count = data["zero_count"]
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        return sketch
+
 
 class StatBuilder:
-    def __init__(self, datalake_directory="datalake/events", datamart_directory="datamart_stats"):
+    def __init__(self, datalake_directory="datalake/events", datamart_directory="datamart_stats", incremental=True,
+                 retention_days=ROLLUP_RETENTION_DAYS):
         self.datalake_directory = datalake_directory
+        self.retention_days = retention_days
         self.datamart_directory = datamart_directory
+        self.incremental = incremental
+        self.state_file = os.path.join(datamart_directory, "builder_state.json")
+        self.rollups_file = os.path.join(datamart_directory, "rollups.json")
 
-    def gather_statistics(self):
-        stats = {
-            "total_requests": 0,
-            "requests_by_endpoint": defaultdict(int),
-            "requests_by_method": defaultdict(int),
-            "status_code_distribution": defaultdict(int),
-            "processing_times": defaultdict(list),
-            "requests_by_ip": defaultdict(int),
-            "user_agents": defaultdict(int),
-            "error_requests": defaultdict(int),
-            "average_processing_time_by_endpoint": {},
+    def empty_state(self):
+        state = {"checkpoints": {}, "total_requests": 0, "processing_time_sketches": {}}
+        for name in COUNTERS:
+            state[name] = {}
+        state["rollups"] = {granularity: {} for granularity in ROLLUP_GRANULARITIES}
+        return state
+
+    def load_state(self):
+        if self.incremental and os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                try:
+                    state = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Corrupt state in {self.state_file}, rebuilding from scratch.")
+                    return self.empty_state()
+            # States written before the sketches kept every processing time.
+            sketches = state.setdefault("processing_time_sketches", {})
+            for endpoint, times in state.pop("processing_times", {}).items():
+                sketch = QuantileSketch()
+                for processing_time in times:
+                    sketch.add(processing_time)
+                sketches[endpoint] = sketch.to_dict()
+            # Rollups only cover events counted since they were introduced;
+            # run with --full to backfill them.
+            rollups = state.setdefault("rollups", {})
+            for granularity in ROLLUP_GRANULARITIES:
+                rollups.setdefault(granularity, {})
+            return state
+        return self.empty_state()
+
+    def save_state(self, state):
+        os.makedirs(self.datamart_directory, exist_ok=True)
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
+
+    def read_events(self, file_path, checkpoint):
+        # Events are appended one JSON object per line to events.ndjson, so the
+        # checkpoint is the byte offset after the last complete line read.
+        # Older days may still hold a single events.json array, which is
+        # checkpointed by the number of events already counted, and skipped
+        # without being parsed while its size and mtime are unchanged.
+        if file_path.endswith(".ndjson"):
+            offset = checkpoint.get("offset", 0)
+            if os.path.getsize(file_path) < offset:
+                print(f"{file_path} is shorter than its checkpoint, reading it again from the start.")
+                offset = 0
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    checkpoint["offset"] = offset
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+            checkpoint["offset"] = offset
+        elif file_path.endswith(".json"):
+            st = os.stat(file_path)
+            if checkpoint.get("size") == st.st_size and checkpoint.get("mtime_ns") == st.st_mtime_ns:
+                return
+            with open(file_path, 'r', encoding='utf-8') as f:
+                try:
+                    events = json.load(f)
+                except json.JSONDecodeError:
+                    return
+            seen = checkpoint.get("events", 0)
+            if len(events) < seen:
+                seen = 0
+            checkpoint.update(events=len(events), size=st.st_size, mtime_ns=st.st_mtime_ns)
+            yield from events[seen:]
+
+    def add_event(self, state, event, sketches, rollup_sketches):
+        state["total_requests"] += 1
+        endpoint = event["endpoint"]
+        method = event["method"]
+        status_code = event.get("status_code", "unknown")
+        ip_address = event["ip_address"]
+        user_agent = event["user_agent"]
+        processing_time = event.get("processing_time")
+
+        counts = []
+        if endpoint:
+            counts.append(("requests_by_endpoint", endpoint))
+        if method:
+            counts.append(("requests_by_method", method))
+        if status_code != "unknown":
+            counts.append(("status_code_distribution", status_code))
+        if ip_address:
+            counts.append(("requests_by_ip", ip_address))
+        if user_agent:
+            counts.append(("user_agents", user_agent))
+        if isinstance(status_code, int) and 400 <= status_code < 600:
+            counts.append(("error_requests", endpoint))
+        for name, value in counts:
+            key = stat_key(value)
+            state[name][key] = state[name].get(key, 0) + 1
+
+        if processing_time is not None:
+            key = stat_key(endpoint)
+            if key not in sketches:
+                sketches[key] = QuantileSketch()
+            sketches[key].add(processing_time)
+
+        timestamp = event.get("timestamp")
+        if timestamp:
+            is_error = isinstance(status_code, int) and 400 <= status_code < 600
+            for granularity, length in ROLLUP_GRANULARITIES.items():
+                bucket_key = timestamp[:length]
+                bucket = state["rollups"][granularity].setdefault(
+                    bucket_key, {"requests": 0, "errors": 0, "endpoints": {}})
+                entry = bucket["endpoints"].setdefault(stat_key(endpoint), {"requests": 0, "errors": 0})
+                for totals in (bucket, entry):
+                    totals["requests"] += 1
+                    if is_error:
+                        totals["errors"] += 1
+                if processing_time is not None:
+                    sketch_key = (granularity, bucket_key, stat_key(endpoint))
+                    if sketch_key not in rollup_sketches:
+                        data = entry.get("processing_time_sketch")
+                        rollup_sketches[sketch_key] = QuantileSketch.from_dict(data) if data else QuantileSketch()
+                    rollup_sketches[sketch_key].add(processing_time)
+
+    def gather_statistics(self, state=None):
+        """Fold the events added since the last checkpoints into ``state`` and return the statistics."""
+        if state is None:
+            state = self.empty_state()
+        checkpoints = state["checkpoints"]
+        sketches = {
+            endpoint: QuantileSketch.from_dict(data)
+            for endpoint, data in state["processing_time_sketches"].items()
         }
+        # Only the rollup sketches touched by new events are deserialized.
+        rollup_sketches = {}
+
         for root, dirs, files in os.walk(self.datalake_directory):
             for event_file in files:
                 file_path = os.path.join(root, event_file)
+                relative_path = os.path.relpath(file_path, self.datalake_directory)
+                checkpoint = checkpoints.setdefault(relative_path, {})
 
-                if not event_file.endswith(".json"):
-                    continue
+                for event in self.read_events(file_path, checkpoint):
+                    self.add_event(state, event, sketches, rollup_sketches)
 
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        events = json.load(f)
-                    except json.JSONDecodeError:
-                        continue
+                if not checkpoint:
+                    del checkpoints[relative_path]
+
+        state["processing_time_sketches"] = {
+            endpoint: sketch.to_dict() for endpoint, sketch in sketches.items()
+        }
+        for (granularity, bucket_key, endpoint), sketch in rollup_sketches.items():
+            entry = state["rollups"][granularity][bucket_key]["endpoints"][endpoint]
+            entry["processing_time_sketch"] = sketch.to_dict()
+        self.prune_rollups(state["rollups"])
 
-                    for event in events:
-                        stats["total_requests"] += 1
-                        endpoint = event["endpoint"]
-                        method = event["method"]
-                        status_code = event.get("status_code", "unknown")
-                        ip_address = event["ip_address"]
-                        user_agent = event["user_agent"]
-                        processing_time = event.get("processing_time")
-
-                        if endpoint:
-                            stats["requests_by_endpoint"][endpoint] += 1
-                        if method:
-                            stats["requests_by_method"][method] += 1
-                        if status_code != "unknown":
-                            stats["status_code_distribution"][status_code] += 1
-                        if processing_time is not None:
-                            stats["processing_times"][endpoint].append(processing_time)
-                        if ip_address:
-                            stats["requests_by_ip"][ip_address] += 1
-                        if user_agent:
-                            stats["user_agents"][user_agent] += 1
-                        if isinstance(status_code, int) and 400 <= status_code < 600:
-                            stats["error_requests"][endpoint] += 1
-
-        for endpoint, times in stats["processing_times"].items():
-            if times:
-                stats["average_processing_time_by_endpoint"][endpoint] = {
-                    "average": mean(times),
-                    "median": median(times),
-                    "max": max(times),
-                    "min": min(times),
-                }
+        stats = {
+            "total_requests": state["total_requests"],
+            "requests_by_endpoint": state["requests_by_endpoint"],
+            "requests_by_method": state["requests_by_method"],
+            "status_code_distribution": state["status_code_distribution"],
+            "processing_time_sketches": state["processing_time_sketches"],
+            "requests_by_ip": state["requests_by_ip"],
+            "user_agents": state["user_agents"],
+            "error_requests": state["error_requests"],
+            "average_processing_time_by_endpoint": {},
+        }
+
+        for endpoint, sketch in sketches.items():
+            summary = sketch.summary()
+            if summary:
+                stats["average_processing_time_by_endpoint"][endpoint] = summary
 
         return stats
 
 
+    def prune_rollups(self, rollups):
+        for granularity, buckets in rollups.items():
+            if not buckets:
+                continue
+            # Both bucket keys start with the "YYYY-MM-DD" date, which sorts in time order.
+            newest_day = datetime.strptime(max(buckets)[:10], "%Y-%m-%d")
+            first_kept = (newest_day - timedelta(days=self.retention_days[granularity] - 1)).strftime("%Y-%m-%d")
+            for bucket_key in [key for key in buckets if key[:10] < first_kept]:
+                del buckets[bucket_key]
+
     def save_statistics(self, stats):
         os.makedirs(self.datamart_directory, exist_ok=True)
         stats_file = os.path.join(self.datamart_directory, "statistics.json")
@@ -76,11 +344,37 @@ class StatBuilder:
             json.dump(stats, f, indent=4, ensure_ascii=False)
         print(f"Stadistic saved in: {stats_file}")
 
+    def save_rollups(self, rollups):
+        os.makedirs(self.datamart_directory, exist_ok=True)
+        temp_file = self.rollups_file + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(rollups, f, ensure_ascii=False)
+        os.replace(temp_file, self.rollups_file)
+        print(f"Rollups saved in: {self.rollups_file}")
+
     def run(self):
-        stats = self.gather_statistics()
+        # The state goes first: statistics.json is always rebuilt from it, so
+        # an interrupted run can never count the same events twice.
+        state = self.load_state()
+        stats = self.gather_statistics(state)
+        self.save_state(state)
         self.save_statistics(stats)
+        self.save_rollups(state["rollups"])
 
 
 if __name__ == "__main__":
-    builder = StatBuilder()
+    parser = argparse.ArgumentParser(description="Build request statistics from the event datalake.")
+    parser.add_argument('--full', action='store_true', help="Ignore the saved checkpoints and rebuild from every event.")
+    parser.add_argument('--hourly-retention-days', type=int, default=ROLLUP_RETENTION_DAYS["hour"],
+                        help="Days of hourly rollups kept, counted back from the newest one.")
+    parser.add_argument('--daily-retention-days', type=int, default=ROLLUP_RETENTION_DAYS["day"],
+                        help="Days of daily rollups kept, counted back from the newest one.")
+    args = parser.parse_args()
+    if args.hourly_retention_days < 1 or args.daily_retention_days < 1:
+        parser.error("Retention must be at least one day")
+
+    builder = StatBuilder(incremental=not args.full, retention_days={
+        "hour": args.hourly_retention_days,
+        "day": args.daily_retention_days,
+    })
     builder.run()
@@ -1,16 +1,238 @@
 import os
 import json
-from flask import Flask, jsonify
+import math
+import time
+import signal
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from flask import Flask, jsonify, request, Response
 
 app = Flask(__name__)
 
 STATS_FILE = os.path.join("datamart_stats", "statistics.json")
+ROLLUPS_FILE = os.path.join("datamart_stats", "rollups.json")
+ROLLUP_FORMATS = {"hour": "%Y-%m-%d %H", "day": "%Y-%m-%d"}
+STATS_CHECK_INTERVAL = float(os.getenv("STATS_CHECK_INTERVAL", 1.0))
 
-def load_statistics():
-    if not os.path.exists(STATS_FILE):
-        return {"error": "Statistics not found. Please run stat-builder.py first."}
-    with open(STATS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+
+class QuantileSketch:
+    """Mergeable DDSketch of positive values with a bounded relative error.
+
+    Each value is counted in the bucket ``ceil(log(x) / log(gamma))``, so any
+    quantile is returned within ``relative_accuracy`` of the true value.
+    Sketches with the same accuracy merge by adding their bucket counts. The
+    number of buckets only depends on the range of the values and is capped
+    at ``max_bins`` by folding the lowest buckets together.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        if value > 1e-9:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self.collapse()
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        if len(self.bins) > self.max_bins:
+            self.collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def collapse(self):
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        folded = sum(self.bins.pop(index) for index in indexes[:excess])
+        self.bins[indexes[excess]] += folded
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        if self.count == 0:
+            return None
+        return {
+            "average": self.sum / self.count,
+            "median": self.quantile(0.5),
+            "max": self.max,
+            "min": self.min,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "count": self.count,
+        }
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "zero_count": self.zero_count,
+            "bins": {str(index): count for index, count in sorted(self.bins.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["relative_accuracy"])
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.zero_count = data["zero_count"]
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        return sketch
+
+
+def file_signature(file_path):
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class StatisticsStore:
+    """Statistics and rollups parsed once and kept in memory.
+
+    The files are checked at most every ``check_interval`` seconds and parsed
+    again only when their inode, mtime or size changed, or when a reload was
+    requested (SIGHUP). The fixed routes are serialized once per load, so
+    serving them is a dict lookup, and the rollup sketches are deserialized
+    once per load, so a range query only merges them.
+    """
+
+    FIXED_ROUTES = {
+        "/stats/processing-times": "average_processing_time_by_endpoint",
+        "/stats/requests-by-ip": "requests_by_ip",
+        "/stats/user-agents": "user_agents",
+        "/stats/errors": "error_requests",
+    }
+
+    def __init__(self, stats_file=STATS_FILE, rollups_file=ROLLUPS_FILE, check_interval=STATS_CHECK_INTERVAL):
+        self.stats_file = stats_file
+        self.rollups_file = rollups_file
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.signature = None
+        self.checked_at = 0.0
+        self.reload_requested = True
+        self.rollups = {}
+        self.sketches = {}
+        self.responses = {}
+
+    def request_reload(self, *args):
+        self.reload_requested = True
+
+    def refresh(self):
+        now = time.monotonic()
+        if not self.reload_requested and now - self.checked_at < self.check_interval:
+            return
+        with self.lock:
+            self.checked_at = now
+            signature = (file_signature(self.stats_file), file_signature(self.rollups_file))
+            if signature != self.signature or self.reload_requested:
+                self.reload_requested = False
+                self.load(signature)
+
+    def load(self, signature):
+        try:
+            stats, rollups = self.read(signature)
+        except (OSError, ValueError) as e:
+            # e.g. a file caught mid-write: the previous statistics keep being
+            # served. The signature is still recorded, so the same broken file
+            # is not parsed on every request; its next change is picked up.
+            print(f"Error loading statistics: {e}")
+            self.signature = signature
+            if self.responses:
+                return
+            stats, rollups = {"error": "Statistics could not be read. Please run stat-builder.py again."}, {}
+
+        responses = {"/stats": self.serialize(stats)}
+        for route, name in self.FIXED_ROUTES.items():
+            responses[route] = self.serialize(stats.get(name, {}))
+
+        # Readers pick up the new values one attribute at a time, each of
+        # which is complete on its own.
+        self.rollups = {granularity: (buckets, sorted(buckets)) for granularity, buckets in rollups.items()}
+        self.sketches = {
+            endpoint: QuantileSketch.from_dict(data)
+            for endpoint, data in stats.get("processing_time_sketches", {}).items()
+        }
+        self.responses = responses
+        self.signature = signature
+        print(f"Statistics loaded from: {self.stats_file}")
+
+    def read(self, signature):
+        if signature[0] is None:
+            stats = {"error": "Statistics not found. Please run stat-builder.py first."}
+        else:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        rollups = {}
+        if signature[1] is not None:
+            with open(self.rollups_file, 'r', encoding='utf-8') as f:
+                rollups = json.load(f)
+        for buckets in rollups.values():
+            for bucket in buckets.values():
+                for entry in bucket["endpoints"].values():
+                    if "processing_time_sketch" in entry:
+                        entry["processing_time_sketch"] = QuantileSketch.from_dict(entry["processing_time_sketch"])
+        return stats, rollups
+
+    def serialize(self, value):
+        return app.json.response(value).get_data()
+
+    def response(self, route):
+        self.refresh()
+        return Response(self.responses[route], mimetype='application/json')
+
+
+store = StatisticsStore()
 
 @app.route('/', methods=['GET'])
 def home():
@@ -20,6 +242,8 @@ def home():
         {"path": "/stats/requests-by-ip", "description": "Number of requests made from each IP address."},
         {"path": "/stats/user-agents", "description": "Summary of user agents used."},
         {"path": "/stats/errors", "description": "Error statistics by endpoint."},
+        {"path": "/stats/percentiles?endpoint=<endpoint>&p=<percentiles>", "description": "Processing time percentiles (comma separated, e.g. p=50,95,99.9) per endpoint, or for one endpoint."},
+        {"path": "/stats/range?from=<datetime>&to=<datetime>&granularity=<hour|day>", "description": "Requests, errors and latency percentiles per endpoint over a time range (ISO dates in local time or with an offset, default the last 24 hours), merged from the hourly or daily rollups (kept for 30 and 365 days by default)."},
     ]
 
     html = """
@@ -81,28 +305,112 @@ def home():
 
 @app.route('/stats', methods=['GET'])
 def get_all_statistics():
-    stats = load_statistics()
-    return jsonify(stats)
+    return store.response('/stats')
 
 @app.route('/stats/processing-times', methods=['GET'])
 def get_processing_times():
-    stats = load_statistics()
-    return jsonify(stats.get("average_processing_time_by_endpoint", {}))
+    return store.response('/stats/processing-times')
 
 @app.route('/stats/requests-by-ip', methods=['GET'])
 def get_requests_by_ip():
-    stats = load_statistics()
-    return jsonify(stats.get("requests_by_ip", {}))
+    return store.response('/stats/requests-by-ip')
 
 @app.route('/stats/user-agents', methods=['GET'])
 def get_user_agents():
-    stats = load_statistics()
-    return jsonify(stats.get("user_agents", {}))
+    return store.response('/stats/user-agents')
 
 @app.route('/stats/errors', methods=['GET'])
 def get_error_statistics():
-    stats = load_statistics()
-    return jsonify(stats.get("error_requests", {}))
+    return store.response('/stats/errors')
+
+@app.route('/stats/percentiles', methods=['GET'])
+def get_percentiles():
+    try:
+        percentiles = [float(p) for p in request.args.get('p', '50,90,99').split(',')]
+    except ValueError:
+        return jsonify({"error": "p must be a comma separated list of numbers"}), 400
+    if not all(0 <= p <= 100 for p in percentiles):
+        return jsonify({"error": "Percentiles must be between 0 and 100"}), 400
+
+    store.refresh()
+    sketches = store.sketches
+    endpoint = request.args.get('endpoint')
+    if endpoint is not None:
+        if endpoint not in sketches:
+            return jsonify({"error": f"No processing times recorded for {endpoint}"}), 404
+        sketches = {endpoint: sketches[endpoint]}
+
+    result = {}
+    for name, sketch in sketches.items():
+        result[name] = {f"p{p:g}": sketch.quantile(p / 100) for p in percentiles}
+    return jsonify(result)
+
+def parse_local_time(value):
+    # Rollup buckets are keyed by the services' local clock, so times with an
+    # offset (e.g. 2024-01-31T13:00+00:00) are converted to naive local time.
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+@app.route('/stats/range', methods=['GET'])
+def get_range_statistics():
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ROLLUP_FORMATS:
+        return jsonify({"error": "granularity must be 'hour' or 'day'"}), 400
+    try:
+        to_time = parse_local_time(request.args['to']) if 'to' in request.args else datetime.now()
+        from_time = parse_local_time(request.args['from']) if 'from' in request.args else to_time - timedelta(days=1)
+    except (ValueError, OverflowError):
+        return jsonify({"error": "from and to must be ISO dates, e.g. 2024-01-31 or 2024-01-31T13:00"}), 400
+
+    # Every bucket that overlaps [from, to) is merged; the keys sort in time
+    # order, so the first one is found by bisecting on the bucket of `from`.
+    time_format = ROLLUP_FORMATS[granularity]
+    store.refresh()
+    buckets, keys = store.rollups.get(granularity, ({}, []))
+    series = []
+    totals = {"requests": 0, "errors": 0}
+    endpoints = {}
+    sketches = {}
+    for bucket_key in keys[bisect_left(keys, from_time.strftime(time_format)):]:
+        start = datetime.strptime(bucket_key, time_format)
+        if start >= to_time:
+            break
+        bucket = buckets[bucket_key]
+        series.append({"start": start.isoformat(), "requests": bucket["requests"], "errors": bucket["errors"]})
+        totals["requests"] += bucket["requests"]
+        totals["errors"] += bucket["errors"]
+        for endpoint, entry in bucket["endpoints"].items():
+            endpoint_totals = endpoints.setdefault(endpoint, {"requests": 0, "errors": 0})
+            endpoint_totals["requests"] += entry["requests"]
+            endpoint_totals["errors"] += entry["errors"]
+            if "processing_time_sketch" in entry:
+                # The rollup sketches are shared between requests, so they
+                # are merged into a fresh one instead of being modified.
+                sketch = entry["processing_time_sketch"]
+                if endpoint not in sketches:
+                    sketches[endpoint] = QuantileSketch(sketch.relative_accuracy)
+                sketches[endpoint].merge(sketch)
+
+    for endpoint, sketch in sketches.items():
+        endpoints[endpoint].update({
+            "average": sketch.sum / sketch.count,
+            "p50": sketch.quantile(0.5),
+            "p90": sketch.quantile(0.9),
+            "p99": sketch.quantile(0.99),
+            "max": sketch.max,
+        })
+
+    return jsonify({
+        "from": from_time.isoformat(),
+        "to": to_time.isoformat(),
+        "granularity": granularity,
+        "totals": totals,
+        "endpoints": endpoints,
+        "series": series,
+    })
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGHUP, store.request_reload)
     app.run(host="0.0.0.0", port=8080, debug=True)
@@ -11,7 +11,7 @@ LAST_SYNC_FILE="/tmp/last_sync_time"
 mkdir -p $DATALAKE_DIR
 
 aws s3 cp s3://$CODE_BUCKET/crawler.py /tmp/crawler.py
-python3 /tmp/crawler.py &  
+python3 /tmp/crawler.py --workers $(nproc) &  
 if [ $? -ne 0 ]; then
     echo "Error running crawler.py in the background"
 fi
@@ -15,7 +15,8 @@ if [ $? -ne 0 ]; then
 fi
 
 QUEUE_URL="https://sqs.us-east-1.amazonaws.com/$ACCOUNT_ID/$DATALAKE_BUCKET-$CURRENT_DATE-queue"
-LOCAL_DATALAKE_DIR="/datalake/$CURRENT_DATE"
+LOCAL_DATALAKE_ROOT="/datalake"
+LOCAL_DATALAKE_DIR="$LOCAL_DATALAKE_ROOT/$CURRENT_DATE"
 LOCAL_DATAMART_DIR="/datamart_dictionary"
 
 mkdir -p $LOCAL_DATALAKE_DIR
@@ -26,6 +27,7 @@ aws s3 cp s3://$CODE_BUCKET/dictionary-builder.py /tmp/dictionary-builder.py
 sync_from_datalake() {
     echo "Syncing data from folder $CURRENT_DATE in bucket $DATALAKE_BUCKET..."
     aws s3 cp s3://$DATALAKE_BUCKET/$CURRENT_DATE/ $LOCAL_DATALAKE_DIR/ --recursive
+    aws s3 cp s3://$DATALAKE_BUCKET/manifest.jsonl $LOCAL_DATALAKE_ROOT/manifest.jsonl
     echo "Sync completed."
 }
 
@@ -49,7 +51,7 @@ process_sqs_messages() {
         sync_from_datalake
 
         echo "Executing the script dictionary-builder.py..."
-        python3 /tmp/dictionary-builder.py
+        python3 /tmp/dictionary-builder.py --workers $(nproc)
 
         echo "Uploading data to the datamart bucket..."
         aws s3 cp $LOCAL_DATAMART_DIR/ s3://$DATAMART_BUCKET/ --recursive
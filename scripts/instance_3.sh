@@ -47,7 +47,7 @@ while true; do
 
         echo "Processing event..."
         sync_from_dictionary
-        python3 /tmp/graph-builder.py
+        python3 /tmp/graph-builder.py --workers $(nproc) --delta
         if [ $? -ne 0 ]; then
             echo "Error executing graph-builder.py."
         fi
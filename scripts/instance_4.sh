@@ -96,10 +96,15 @@ monitor_sqs_datamart_graph() {
 
             echo "Processing event..."
             sync_from_datamart_graph
-            pkill -f graph-query.py
-            python3 $SCRIPT_PATH &
-            if [ $? -ne 0 ]; then
-                echo "Error restarting the Flask API with $SCRIPT_PATH."
+            if [ -f $LOCAL_DATAMART_GRAPH_DIR/word_graph_delta.txt ] && curl -sf http://localhost:8080/apply-delta > /dev/null; then
+                echo "Graph delta applied to the running API."
+            else
+                echo "Reloading the graph in the Flask API..."
+                pkill -HUP -f graph-query.py
+                if [ $? -ne 0 ]; then
+                    echo "Flask API not running, starting it..."
+                    python3 $SCRIPT_PATH &
+                fi
             fi
 
         else
@@ -53,11 +53,11 @@ process_sqs_messages() {
             echo "Processing event for $DATAMART_STATS_BUCKET..."
             sync_from_bucket
 
-            echo "Restarting the Flask service..."
-            pkill -f stat-query.py
-            python3 $SCRIPT_PATH &
+            echo "Reloading the statistics in the Flask service..."
+            pkill -HUP -f stat-query.py
             if [ $? -ne 0 ]; then
-                echo "Error restarting the Flask service."
+                echo "Flask service not running, starting it..."
+                python3 $SCRIPT_PATH &
             fi
 
             echo "Deleting message from the SQS queue..."
@@ -1,4 +1,5 @@
 import requests
+import json
 import os
 
 API_URL = os.getenv("API_URL")
@@ -19,6 +20,20 @@ def test_shortest_path():
         assert response.status_code == 200
         print("✔️ /shortest-path responds correctly")
 
+# 2b. Endpoint: `/shortest-path` with each search strategy
+def test_shortest_path_strategies():
+    for strategy in ("dijkstra", "bidirectional", "astar"):
+        params = {"origen": "final", "destino": "found", "strategy": strategy}
+        response = requests.get(f"{API_URL}/shortest-path", params=params)
+        if response.status_code == 404:
+            print(f"✔️ /shortest-path ({strategy}): Nodes do not exist in the graph (expected)")
+        else:
+            assert response.status_code == 200
+            assert response.json()["strategy"] == strategy
+            print(f"✔️ /shortest-path ({strategy}) responds correctly, {response.json()['nodes_expanded']} nodes expanded")
+    response = requests.get(f"{API_URL}/shortest-path", params={"origen": "final", "destino": "found", "strategy": "unknown"})
+    assert response.status_code == 400
+
 # 3. Endpoint: `/all-paths`
 def test_all_paths():
     params = {
@@ -35,6 +50,19 @@ def test_all_paths():
         paths_data = response.json().get("weighted_paths", [])
         print(f"✔️ /all-paths responds correctly with {len(paths_data)} paths returned")
 
+# 3b. Endpoint: `/all-paths` streamed as newline-delimited JSON
+def test_all_paths_stream():
+    params = {"origen": "final", "destino": "found", "max_depth": 6, "max_paths": 20, "stream": 1}
+    response = requests.get(f"{API_URL}/all-paths", params=params, stream=True)
+    if response.status_code == 404:
+        print("✔️ /all-paths?stream=1: Nodes do not exist in the graph (expected)")
+    else:
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("application/x-ndjson")
+        paths_data = [json.loads(line) for line in response.iter_lines() if line]
+        assert len(paths_data) <= params["max_paths"]
+        print(f"✔️ /all-paths?stream=1 streams {len(paths_data)} paths")
+
 # 4. Endpoint: `/maximum-distance`
 def test_maximum_distance():
     response = requests.get(f"{API_URL}/maximum-distance")
@@ -47,6 +75,14 @@ def test_clusters():
     assert response.status_code == 200
     print("✔️ /clusters responds correctly")
 
+# 5b. Endpoint: `/clusters` streamed as newline-delimited JSON
+def test_clusters_stream():
+    response = requests.get(f"{API_URL}/clusters", headers={"Accept": "application/x-ndjson"}, stream=True)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert lines[-1]["total_clusters"] == len(lines) - 1
+    print(f"✔️ /clusters streams {len(lines) - 1} clusters")
+
 # 6. Endpoint: `/high-connectivity-nodes`
 def test_high_connectivity_nodes():
     params = {"min": 2}
@@ -80,23 +116,48 @@ def test_reset_graph():
     assert response.status_code == 200
     print("✔️ /reset-graph responds correctly")
 
+# 10b. Endpoint: `/apply-delta`
+def test_apply_delta():
+    response = requests.get(f"{API_URL}/apply-delta")
+    # 404 without a delta and 409 when the delta belongs to another graph.
+    assert response.status_code in (200, 404, 409)
+    if response.status_code == 200:
+        assert "edges_count" in response.json()
+    print("✔️ /apply-delta responds correctly")
+
 # 11. Endpoint: `/health`
 def test_health():
     response = requests.get(f"{API_URL}/health")
     assert response.status_code == 200
     print("✔️ /health responds correctly")
 
+# 12. Endpoint: `/cache-stats`
+def test_cache_stats():
+    params = {"origen": "final", "destino": "found"}
+    requests.get(f"{API_URL}/shortest-path", params=params)
+    requests.get(f"{API_URL}/shortest-path", params=params)
+    response = requests.get(f"{API_URL}/cache-stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert "hits" in stats and "misses" in stats
+    print(f"✔️ /cache-stats responds correctly ({stats['hits']} hits, {stats['misses']} misses)")
+
 # Execute all tests
 if __name__ == "__main__":
     print("\n=== Running API tests ===\n")
     test_home()
     test_shortest_path()
+    test_shortest_path_strategies()
     test_all_paths()
+    test_all_paths_stream()
     test_maximum_distance()
     test_clusters()
+    test_clusters_stream()
     test_high_connectivity_nodes()
     test_nodes_by_degree()
     test_isolated_nodes()
     test_filter_graph()
     test_reset_graph()
-    test_health()
\ No newline at end of file
+    test_apply_delta()
+    test_health()
+    test_cache_stats()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import os
+import sys
+import glob
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+CRAWLER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "..", "..", "..", "graphword", "src", "main", "services", "data-processing")
+sys.path.insert(0, os.path.normpath(CRAWLER_DIRECTORY))
+
+import crawler
+
+
+class GutenbergStandIn(BaseHTTPRequestHandler):
+    """Serves /cache/epub/<id>/pg<id>.txt like gutenberg.org, with scripted failures."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        book_id = int(self.path.rsplit("/pg", 1)[-1][:-4])
+        with self.server.lock:
+            self.server.requests.append((time.monotonic(), book_id))
+            failures = self.server.failures.get(book_id, 0)
+            if failures:
+                self.server.failures[book_id] = failures - 1
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+
+        if book_id in self.server.missing:
+            status, body = 404, b"Not found"
+        elif failures:
+            status, body = 503, b"Try again later"
+        else:
+            status, body = 200, f"Book {book_id}\n".encode("utf-8") * 100
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), GutenbergStandIn)
+    http_server.daemon_threads = True
+    http_server.lock = threading.Lock()
+    http_server.connections = 0
+    http_server.requests = []
+    http_server.active = 0
+    http_server.max_active = 0
+    http_server.failures = {}
+    http_server.missing = set()
+    http_server.delay = 0.0
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def make_downloader(server, book_ids, **kwargs):
+    host, port = server.server_address
+    urls = [f"http://{host}:{port}/cache/epub/{book_id}/pg{book_id}.txt" for book_id in book_ids]
+    kwargs.setdefault("backoff", 0.01)
+    return crawler.BatchDownloader(len(urls), crawler.GutenbergFileReader(), urls, **kwargs)
+
+
+def downloaded_books():
+    return sorted(int(os.path.basename(path)[:-4]) for path in glob.glob(os.path.join("datalake", "*", "*", "*.txt")))
+
+
+def test_concurrent_download_fetches_every_book(server):
+    server.delay = 0.2
+    downloader = make_downloader(server, range(1, 9), concurrency=8)
+
+    assert downloader.download_batch() == 8
+    assert downloaded_books() == list(range(1, 9))
+    assert server.max_active > 1
+
+
+def test_session_reuses_connections(server):
+    downloader = make_downloader(server, range(1, 6))
+
+    assert downloader.download_batch() == 5
+    assert server.connections == 1
+
+
+def test_server_errors_are_retried_with_backoff(server):
+    server.failures = {3: 2}
+    downloader = make_downloader(server, [2, 3], retries=3)
+
+    assert downloader.download_batch() == 2
+    assert downloaded_books() == [2, 3]
+    assert [book_id for _, book_id in server.requests].count(3) == 3
+
+
+def test_missing_books_are_not_retried(server):
+    server.missing = {4}
+    downloader = make_downloader(server, [4, 5], concurrency=2)
+
+    downloader.download_batch()
+
+    assert downloaded_books() == [5]
+    assert [book_id for _, book_id in server.requests].count(4) == 1
+
+
+def test_rate_limit_spaces_requests_to_the_same_host(server):
+    downloader = make_downloader(server, range(1, 6), concurrency=5, rate_limit=0.3)
+
+    assert downloader.download_batch() == 5
+    times = sorted(request_time for request_time, _ in server.requests)
+    # Generous margin: arrival times at the server jitter on a loaded machine.
+    assert all(later - earlier >= 0.15 for earlier, later in zip(times, times[1:]))
@@ -0,0 +1,52 @@
+import os
+import sys
+import random
+from collections import Counter
+
+import pytest
+
+CRAWLER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "..", "..", "..", "graphword", "src", "main", "services", "data-processing")
+sys.path.insert(0, os.path.normpath(CRAWLER_DIRECTORY))
+
+import crawler
+
+
+def book_text(seed, words=3000):
+    """Gutenberg-like text: capitals, accents, stopwords, digits, punctuation and line breaks."""
+    rng = random.Random(seed)
+    vocabulary = ["Canción", "ÁRBOL", "niño", "el", "La", "de", "y", "camión", "İstanbul", "über", "año2024",
+                  "mañana", "O", "casa", "perro", "Ñandú", "straße", "ΣΟΦΙΑ"]
+    separators = [" ", "  ", "\n", "\r\n", ", ", ". ", "; ", "--", "\t", " (", ") ", "¡", "¿", "_"]
+    parts = [rng.choice(separators)]
+    for _ in range(words):
+        parts.append(rng.choice(vocabulary))
+        parts.append(rng.choice(separators))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+def test_streaming_normalizer_matches_whole_file_normalization(tmp_path, chunk_size):
+    reader = crawler.NormalizedGutenbergFileReader(chunk_size=chunk_size)
+    for seed in range(3):
+        text = book_text(seed)
+        original_path = tmp_path / f"book_{seed}.txt"
+        original_path.write_text(text, encoding="utf-8")
+
+        reader.process_and_save_normalized_file(seed, str(original_path))
+
+        # What the crawler wrote before normalizing in chunks.
+        expected = reader.remove_stopwords(reader.normalize_text(text))
+        assert (tmp_path / f"normalized_{seed}.txt").read_text(encoding="utf-8") == expected
+        expected_vocabulary = "".join(f"{word}: {count}\n" for word, count in Counter(expected.split()).items())
+        assert (tmp_path / f"vocab_{seed}.txt").read_text(encoding="utf-8") == expected_vocabulary
+
+
+def test_streaming_normalizer_handles_edge_cases(tmp_path):
+    reader = crawler.NormalizedGutenbergFileReader(chunk_size=4)
+    for seed, text in enumerate(["", "   \n", "el la de", "Palabra", "una palabra larguísima\n", "...fin"]):
+        original_path = tmp_path / f"book_{seed}.txt"
+        original_path.write_text(text, encoding="utf-8")
+        reader.process_and_save_normalized_file(seed, str(original_path))
+        expected = reader.remove_stopwords(reader.normalize_text(text))
+        assert (tmp_path / f"normalized_{seed}.txt").read_text(encoding="utf-8") == expected
@@ -0,0 +1,105 @@
+import os
+import random
+import importlib.util
+
+import networkx as nx
+import pytest
+
+GRAPH_MANAGEMENT_DIRECTORY = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "..", "graphword", "src", "main", "services", "graph-management"))
+
+
+def load_service(name, file_name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(GRAPH_MANAGEMENT_DIRECTORY, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def graph_query(tmp_path_factory):
+    # graph-query starts loading datamart_graph/ from the working directory on
+    # import, so it is imported (and its first load awaited) in an empty one.
+    working_directory = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("graph-query"))
+    try:
+        module = load_service("graph_query", "graph-query.py")
+        module.graph_holder.ready.wait(30)
+    finally:
+        os.chdir(working_directory)
+    return module
+
+
+def random_edges(seed):
+    """Small random digraph with few distinct weights, so shortest paths tie often."""
+    rng = random.Random(seed)
+    words = list(dict.fromkeys(f"w{rng.randrange(1000):03d}" for _ in range(rng.randint(5, 40))))
+    edges = {}
+    for _ in range(rng.randint(len(words), 4 * len(words))):
+        edges[tuple(rng.sample(words, 2))] = float(rng.randint(1, 3))
+    edges = [(u, v, weight) for (u, v), weight in edges.items()]
+    rng.shuffle(edges)
+    return edges
+
+
+def search(backend, graph_query, source, target, strategy):
+    try:
+        return backend.search_path(source, target, strategy)[0]
+    except graph_query.NoPathError:
+        return None
+
+
+@pytest.mark.parametrize("strategy", ["dijkstra", "bidirectional", "astar"])
+def test_csr_backend_matches_networkx_paths(graph_query, strategy):
+    for seed in range(100):
+        edges = random_edges(seed)
+        reference = graph_query.NetworkXGraphBackend.from_edges(edges)
+        backend = graph_query.CSRGraphBackend.from_edges(edges)
+        rng = random.Random(seed)
+        words = list(reference.graph)
+        for _ in range(10):
+            source, target = rng.choice(words), rng.choice(words)
+            expected = search(reference, graph_query, source, target, strategy)
+            assert search(backend, graph_query, source, target, strategy) == expected, (seed, source, target)
+            if expected is not None:
+                assert backend.path_weight(expected) == reference.path_weight(expected)
+
+
+def test_default_strategy_matches_networkx_shortest_path(graph_query):
+    for seed in range(100):
+        edges = random_edges(seed)
+        graph = nx.DiGraph()
+        graph.add_weighted_edges_from(edges)
+        backend = graph_query.CSRGraphBackend.from_edges(edges)
+        rng = random.Random(seed)
+        for _ in range(10):
+            source, target = rng.choice(list(graph)), rng.choice(list(graph))
+            try:
+                expected = nx.shortest_path(graph, source, target, weight='weight')
+            except nx.NetworkXNoPath:
+                expected = None
+            assert search(backend, graph_query, source, target, "bidirectional") == expected
+            if expected is not None:
+                assert backend.shortest_path(source, target) == expected
+
+
+def test_binary_graph_matches_text_graph(graph_query, tmp_path):
+    graph_builder = load_service("graph_builder", "graph-builder.py")
+    # Large weights do not fit float32's 7 significant digits.
+    edges = sorted((u, v, weight * 1234.5678) for u, v, weight in random_edges(7))
+    text_file, binary_file = tmp_path / "word_graph.txt", tmp_path / "word_graph.bin"
+    text_file.write_text("".join(f"{u} {v} {weight:.4f}\n" for u, v, weight in edges), encoding="utf-8")
+    graph_builder.save_csr_graph(str(text_file), str(binary_file))
+
+    reference = graph_query.NetworkXGraphBackend.from_edges(graph_query.read_text_edges(str(text_file)))
+    backend = graph_query.CSRGraphBackend.from_csr_file(graph_query.CSRGraphFile(str(binary_file)))
+    assert list(backend.edges()) == list(reference.edges())
+    rng = random.Random(7)
+    words = list(reference.graph)
+    for _ in range(50):
+        source, target = rng.choice(words), rng.choice(words)
+        expected = search(reference, graph_query, source, target, "bidirectional")
+        assert search(backend, graph_query, source, target, "bidirectional") == expected
+        if expected is not None:
+            assert backend.path_weight(expected) == reference.path_weight(expected)
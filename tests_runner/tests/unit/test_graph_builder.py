@@ -0,0 +1,98 @@
+import os
+import sys
+import random
+import importlib.util
+
+import pytest
+
+GRAPH_MANAGEMENT_DIRECTORY = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "..", "graphword", "src", "main", "services", "graph-management"))
+
+
+@pytest.fixture(scope="module")
+def graph_builder():
+    spec = importlib.util.spec_from_file_location("graph_builder", os.path.join(GRAPH_MANAGEMENT_DIRECTORY, "graph-builder.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["graph_builder"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def fixture_vocabulary(seed=0, size=600):
+    """Words over a small alphabet (accents included), so most of them have neighbors."""
+    rng = random.Random(seed)
+    vocabulary = {}
+    while len(vocabulary) < size:
+        word = "".join(rng.choice("abcdeé") for _ in range(rng.randint(2, 8)))
+        vocabulary[word] = rng.randint(1, 50)
+    return vocabulary
+
+
+def changed_vocabulary(vocabulary, seed=1):
+    """Drop, recount and add words, like a new batch of books would."""
+    rng = random.Random(seed)
+    changed = dict(vocabulary)
+    words = sorted(vocabulary)
+    for word in rng.sample(words, 60):
+        del changed[word]
+    for word in rng.sample(words, 60):
+        if word in changed:
+            changed[word] += rng.randint(1, 50)
+    for _ in range(60):
+        word = "".join(rng.choice("abcdeéf") for _ in range(rng.randint(3, 7)))
+        changed[word] = changed.get(word, 0) + rng.randint(1, 9)
+    return changed
+
+
+def build(graph_builder, directory, vocabulary, **options):
+    dictionary_directory = directory / "datamart_dictionary"
+    dictionary_directory.mkdir(parents=True, exist_ok=True)
+    with open(dictionary_directory / "global_vocabulary.txt", "w", encoding="utf-8") as vocab_file:
+        for word, count in vocabulary.items():
+            vocab_file.write(f"{word}: {count}\n")
+    graph_file = directory / "datamart_graph" / "word_graph.txt"
+    graph_builder.Controller(str(dictionary_directory), str(graph_file), **options).execute()
+    return graph_file.parent
+
+
+def test_delta_matches_full_rebuild(graph_builder, tmp_path):
+    vocabulary = fixture_vocabulary()
+    changed = changed_vocabulary(vocabulary)
+
+    updated = build(graph_builder, tmp_path / "updated", vocabulary)
+    base_checksum = graph_builder.file_checksum(str(updated / "word_graph.txt"))
+    build(graph_builder, tmp_path / "updated", changed, delta=True)
+    rebuilt = build(graph_builder, tmp_path / "rebuilt", changed)
+
+    for file_name in ("word_graph.txt", "word_graph.bin", "word_graph_vocabulary.txt"):
+        assert (updated / file_name).read_bytes() == (rebuilt / file_name).read_bytes(), file_name
+
+    with open(updated / "word_graph_delta.txt", encoding="utf-8") as delta_file:
+        header = [next(delta_file).split(), next(delta_file).split()]
+        changes = sum(1 for _ in delta_file)
+    edges = (rebuilt / "word_graph.txt").read_text(encoding="utf-8").splitlines()
+    nodes = {word for line in edges for word in line.split()[:2]}
+    assert header == [
+        ["#", "base", base_checksum],
+        ["#", "target", graph_builder.file_checksum(str(rebuilt / "word_graph.txt")), str(len(nodes)), str(len(edges))],
+    ]
+    assert 0 < changes < len(edges)
+
+
+def test_full_build_removes_stale_delta(graph_builder, tmp_path):
+    vocabulary = fixture_vocabulary()
+    build(graph_builder, tmp_path, vocabulary)
+    graph_directory = build(graph_builder, tmp_path, changed_vocabulary(vocabulary), delta=True)
+    assert (graph_directory / "word_graph_delta.txt").exists()
+    build(graph_builder, tmp_path, vocabulary)
+    assert not (graph_directory / "word_graph_delta.txt").exists()
+
+
+def test_numpy_engine_matches_python_engine(graph_builder, tmp_path):
+    pytest.importorskip("numpy")
+    vocabulary = fixture_vocabulary(seed=2)
+    python_graph = build(graph_builder, tmp_path / "python", vocabulary, engine="python")
+    numpy_graph = build(graph_builder, tmp_path / "numpy", vocabulary, engine="numpy")
+    for file_name in ("word_graph.txt", "word_graph.bin"):
+        assert (python_graph / file_name).read_bytes() == (numpy_graph / file_name).read_bytes(), file_name
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import random
+import inspect
+import importlib.util
+
+import pytest
+
+STATISTICS_DIRECTORY = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "..", "..", "graphword", "src", "main", "services", "statistics"))
+
+QUANTILES = (0, 0.01, 0.25, 0.5, 0.9, 0.99, 1)
+
+
+def load_service(name, file_name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(STATISTICS_DIRECTORY, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# stat-builder and stat-query are deployed as single files, so each carries its
+# own QuantileSketch; sketches written by one are read by the other.
+@pytest.fixture(scope="module")
+def sketch_classes():
+    return (load_service("stat_builder", "stat-builder.py").QuantileSketch,
+            load_service("stat_query", "stat-query.py").QuantileSketch)
+
+
+def processing_times(seed, count=5000):
+    rng = random.Random(seed)
+    # Zeros and values across many orders of magnitude, so about a thousand bins are used.
+    return [0.0 if rng.random() < 0.05 else rng.lognormvariate(-5, 4) for _ in range(count)]
+
+
+def test_copies_are_identical(sketch_classes):
+    builder_sketch, query_sketch = sketch_classes
+    assert inspect.getsource(builder_sketch) == inspect.getsource(query_sketch)
+
+
+@pytest.mark.parametrize("direction", ["builder_to_query", "query_to_builder"])
+def test_sketches_round_trip_between_services(sketch_classes, direction):
+    writer, reader = sketch_classes if direction == "builder_to_query" else sketch_classes[::-1]
+    for seed in range(5):
+        written = writer()
+        for value in processing_times(seed):
+            written.add(value)
+        data = json.loads(json.dumps(written.to_dict()))
+        read = reader.from_dict(data)
+        assert read.to_dict() == written.to_dict()
+        assert [read.quantile(q) for q in QUANTILES] == [written.quantile(q) for q in QUANTILES]
+        assert read.summary() == written.summary()
+
+
+def test_merged_sketches_agree_between_services(sketch_classes):
+    builder_sketch, query_sketch = sketch_classes
+    parts = [processing_times(seed, 1000) for seed in range(4)]
+    merged = {}
+    for sketch_class in sketch_classes:
+        merged[sketch_class] = sketch_class()
+        for values in parts:
+            part = sketch_class()
+            for value in values:
+                part.add(value)
+            merged[sketch_class].merge(sketch_class.from_dict(part.to_dict()))
+    assert merged[builder_sketch].to_dict() == merged[query_sketch].to_dict()
+    assert [merged[builder_sketch].quantile(q) for q in QUANTILES] == \
+        [merged[query_sketch].quantile(q) for q in QUANTILES]
+
+
+def test_collapsed_sketches_agree_between_services(sketch_classes):
+    sketches = [sketch_class(max_bins=64) for sketch_class in sketch_classes]
+    for sketch in sketches:
+        for value in processing_times(0):
+            sketch.add(value)
+    assert len(sketches[0].bins) == 64
+    assert sketches[0].to_dict() == sketches[1].to_dict()
+    assert [sketches[0].quantile(q) for q in QUANTILES] == [sketches[1].quantile(q) for q in QUANTILES]